@@ -17,10 +17,15 @@
     'data': [
         'security/ir.model.access.csv',
         'data/account_account_type.xml',
+        'data/account_balance_snapshot.xml',
+        'data/account_report_job.xml',
+        'data/account_report_index.xml',
+        'security/account_report_job_security.xml',
         'views/menu.xml',
         'views/ledger_menu.xml',
         'views/financial_report.xml',
         'views/settings.xml',
+        'views/account_report_job.xml',
         'wizard/account_report_common_view.xml',
         'wizard/partner_ledger.xml',
         'wizard/general_ledger.xml',
@@ -41,5 +46,6 @@
         'report/report_journal_entries.xml',
     ],
     'pre_init_hook': '_pre_init_clean_m2m_models',
+    'post_init_hook': '_post_init_build_balance_snapshot',
     'images': ['static/description/banner.gif'],
 }
@@ -1,3 +1,16 @@
 from . import account_account_type
 from . import account_financial_report
 from . import account_move_line
+from . import res_currency
+from . import account_balance_snapshot
+from . import account_move
+from . import account_report_ledger
+from . import account_report_job
+from . import account_report_cache
+from . import ir_actions_report
+from . import account_account
+from . import account_report_index
+from . import account_report_consolidation
+from . import account_journal
+from . import res_partner
+from . import account_tax
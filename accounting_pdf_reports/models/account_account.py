@@ -0,0 +1,12 @@
+from odoo import models
+
+
+class AccountAccount(models.Model):
+    _inherit = "account.account"
+
+    def write(self, vals):
+        res = super().write(vals)
+        # the cached reports display the code and name of the accounts
+        if 'code' in vals or 'name' in vals:
+            self.env['account.report.cache']._clear()
+        return res
@@ -0,0 +1,220 @@
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+from odoo.tools.sql import create_index, drop_constraint
+
+from .account_move_line import QUERY_GET_RECORDSET_KEYS
+
+
+def _domain_restriction(domain):
+    """ Consume the first term of ``domain``, a normalized domain in prefix
+        notation, and return what it restricts: 'none' (always true, e.g. the
+        ``[(1, '=', 1)]`` of a see-all rule), 'company' (only company
+        leaves) or 'other'. """
+    token = domain.pop(0)
+    if token in ('&', '|'):
+        left, right = _domain_restriction(domain), _domain_restriction(domain)
+        if token == '|' and 'none' in (left, right):
+            return 'none'
+        if 'other' in (left, right):
+            return 'other'
+        return 'company' if 'company' in (left, right) else 'none'
+    if token == '!':
+        _domain_restriction(domain)
+        return 'other'
+    if tuple(token) == (1, '=', 1):
+        return 'none'
+    if token[0] == 'company_id':
+        return 'company'
+    return 'other'
+
+
+class AccountBalanceSnapshot(models.Model):
+    """ Debit and credit of the posted move lines per company, account,
+        journal and month.
+
+        The changes are appended as new rows rather than added to a single
+        row per key, so that concurrent postings never update the same row;
+        the rows of a key are summed when read, and merged by
+        ``_gc_compact_snapshot``.
+    """
+    _name = "account.balance.snapshot"
+    _description = "Monthly Account Balance Snapshot"
+    _order = "month, company_id, account_id, journal_id"
+
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True, index=True)
+    account_id = fields.Many2one('account.account', string='Account', required=True, readonly=True)
+    journal_id = fields.Many2one('account.journal', string='Journal', required=True, readonly=True)
+    month = fields.Date(string='Month', required=True, readonly=True)
+    company_currency_id = fields.Many2one(related='company_id.currency_id', string='Company Currency')
+    debit = fields.Monetary(string='Debit', currency_field='company_currency_id', readonly=True)
+    credit = fields.Monetary(string='Credit', currency_field='company_currency_id', readonly=True)
+
+    def init(self):
+        drop_constraint(self.env.cr, self._table, 'account_balance_snapshot_snapshot_uniq')
+        create_index(self.env.cr, 'account_balance_snapshot_key_index', self._table,
+                     ['company_id', 'account_id', 'month', 'journal_id'])
+
+    @api.model
+    def _is_ready(self):
+        return bool(self.env['ir.config_parameter'].sudo().get_param('accounting_pdf_reports.balance_snapshot_ready'))
+
+    @api.model
+    def _rebuild(self):
+        """ Recreate the snapshot from the posted move lines. """
+        self.env['account.move.line'].flush_model(['parent_state', 'date', 'debit', 'credit', 'account_id', 'journal_id', 'company_id'])
+        self.env.cr.execute("DELETE FROM account_balance_snapshot")
+        self.env.cr.execute("""
+            INSERT INTO account_balance_snapshot (company_id, account_id, journal_id, month, debit, credit)
+            SELECT company_id, account_id, journal_id, date_trunc('month', date)::date,
+                   COALESCE(SUM(debit), 0), COALESCE(SUM(credit), 0)
+            FROM account_move_line
+            WHERE parent_state = 'posted' AND account_id IS NOT NULL
+            GROUP BY company_id, account_id, journal_id, date_trunc('month', date)""")
+        self.env['ir.config_parameter'].sudo().set_param('accounting_pdf_reports.balance_snapshot_ready', '1')
+        self.invalidate_model()
+
+    @api.model
+    def _apply_moves(self, moves, sign):
+        """ Add (``sign`` = 1) or remove (``sign`` = -1) the lines of
+            ``moves`` to the snapshot. """
+        self._apply_lines(moves.line_ids, sign)
+
+    @api.model
+    def _apply_lines(self, lines, sign):
+        """ Add (``sign`` = 1) or remove (``sign`` = -1) the move lines
+            ``lines`` to the snapshot. """
+        if not lines or not self._is_ready():
+            return
+        self.env['account.move.line'].flush_model(['date', 'debit', 'credit', 'account_id', 'journal_id', 'company_id'])
+        self.env.cr.execute("""
+            INSERT INTO account_balance_snapshot (company_id, account_id, journal_id, month, debit, credit)
+            SELECT company_id, account_id, journal_id, date_trunc('month', date)::date,
+                   %(sign)s * COALESCE(SUM(debit), 0), %(sign)s * COALESCE(SUM(credit), 0)
+            FROM account_move_line
+            WHERE id IN %(line_ids)s AND account_id IS NOT NULL
+            GROUP BY company_id, account_id, journal_id, date_trunc('month', date)""",
+            {'sign': sign, 'line_ids': tuple(lines.ids)})
+        self.invalidate_model()
+
+    @api.autovacuum
+    def _gc_compact_snapshot(self):
+        """ Merge the rows of each company, account, journal and month into
+            one, dropping the ones summing to zero. """
+        self.env.cr.execute("""
+            WITH merged AS (
+                DELETE FROM account_balance_snapshot
+                WHERE (company_id, account_id, journal_id, month) IN (
+                    SELECT company_id, account_id, journal_id, month
+                    FROM account_balance_snapshot
+                    GROUP BY company_id, account_id, journal_id, month
+                    HAVING COUNT(*) > 1 OR SUM(debit) = 0 AND SUM(credit) = 0)
+                RETURNING company_id, account_id, journal_id, month, debit, credit
+            )
+            INSERT INTO account_balance_snapshot (company_id, account_id, journal_id, month, debit, credit)
+            SELECT company_id, account_id, journal_id, month, SUM(debit), SUM(credit)
+            FROM merged
+            GROUP BY company_id, account_id, journal_id, month
+            HAVING SUM(debit) != 0 OR SUM(credit) != 0""")
+        self.invalidate_model()
+
+    @api.model
+    def _has_line_rules(self):
+        """ Whether the move lines of the user are restricted by record rules
+            other than the company ones, which the snapshot cannot apply. """
+        if self.env.su:
+            return False
+        # the group rules are OR'ed, a see-all rule cancels the others
+        domain = list(self.env['ir.rule']._compute_domain('account.move.line', 'read') or [])
+        while domain:
+            if _domain_restriction(domain) == 'other':
+                return True
+        return False
+
+    @api.model
+    def _get_balances(self, account_ids):
+        """ Return ``{account_id: {'debit': ..., 'credit': ..., 'balance': ...}}``
+            for the filters of the context, or None when the context uses a
+            filter the snapshot cannot answer (draft entries, analytic or
+            partner filters...). Whole months are read from the snapshot,
+            the days of the partial months at both ends of the range are
+            read from the move lines.
+        """
+        context = self.env.context
+        if not account_ids or not self._is_ready():
+            return None
+        if (context.get('state') or '').lower() != 'posted' or context.get('aged_balance') or context.get('reconcile_date'):
+            return None
+        if any(context.get(name) for name in QUERY_GET_RECORDSET_KEYS):
+            return None
+        if self._has_line_rules():
+            return None
+        date_from = fields.Date.to_date(context.get('date_from'))
+        date_to = fields.Date.to_date(context.get('date_to'))
+        if date_from and not context.get('strict_range'):
+            return None
+        if context.get('initial_bal'):
+            if not date_from:
+                return None
+            date_from, date_to = False, date_from - relativedelta(days=1)
+
+        self.env['account.move.line'].check_access('read')
+        if context.get('company_id'):
+            company_ids = [context['company_id']]
+        elif context.get('allowed_company_ids'):
+            company_ids = self.env.companies.ids
+        else:
+            company_ids = [self.env.company.id]
+        where = "company_id IN %s AND account_id IN %s"
+        params = [tuple(company_ids), tuple(account_ids)]
+        if context.get('journal_ids'):
+            where += " AND journal_id IN %s"
+            params.append(tuple(context['journal_ids']))
+
+        # whole months covered by the range: month_from <= month < month_to
+        month_from = month_to = False
+        if date_from:
+            month_from = date_from if date_from.day == 1 else date_from.replace(day=1) + relativedelta(months=1)
+        if date_to:
+            next_day = date_to + relativedelta(days=1)
+            month_to = next_day if next_day.day == 1 else date_to.replace(day=1)
+
+        queries = []
+        if month_from and month_to and month_from >= month_to:
+            edges = [(date_from, date_to)]
+        else:
+            month_where, month_params = where, list(params)
+            if month_from:
+                month_where += " AND month >= %s"
+                month_params.append(month_from)
+            if month_to:
+                month_where += " AND month < %s"
+                month_params.append(month_to)
+            queries.append(("""
+                SELECT account_id, SUM(debit), SUM(credit)
+                FROM account_balance_snapshot
+                WHERE """ + month_where + """
+                GROUP BY account_id""", month_params))
+            # partial months at both ends of the range
+            edges = []
+            if date_from and date_from < month_from:
+                edges.append((date_from, month_from - relativedelta(days=1)))
+            if date_to and month_to <= date_to:
+                edges.append((month_to, date_to))
+        for edge_from, edge_to in edges:
+            queries.append(("""
+                SELECT account_id, SUM(debit), SUM(credit)
+                FROM account_move_line
+                WHERE parent_state = 'posted' AND """ + where + """
+                    AND date >= %s AND date <= %s
+                GROUP BY account_id""", params + [edge_from, edge_to]))
+
+        res = {}
+        for query, query_params in queries:
+            self.env.cr.execute(query, query_params)
+            for account_id, debit, credit in self.env.cr.fetchall():
+                value = res.setdefault(account_id, {'debit': 0.0, 'credit': 0.0, 'balance': 0.0})
+                value['debit'] += debit or 0.0
+                value['credit'] += credit or 0.0
+                value['balance'] += (debit or 0.0) - (credit or 0.0)
+        return res
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from odoo import api, models, fields
 
 
@@ -16,12 +18,38 @@ class AccountFinancialReport(models.Model):
             report.level = level
 
     def _get_children_by_order(self):
-        res = self
-        children = self.search([('parent_id', 'in', self.ids)], order='sequence ASC')
-        if children:
-            for child in children:
-                res += child._get_children_by_order()
-        return res
+        """ Return the records followed by all their descendants, depth
+            first and ordered by sequence. The tree is loaded with one
+            query. """
+        if not self:
+            return self
+        self.env.cr.execute("""
+            WITH RECURSIVE tree(id) AS (
+                SELECT id FROM account_financial_report WHERE parent_id IN %s
+                UNION
+                SELECT r.id FROM account_financial_report r JOIN tree ON r.parent_id = tree.id
+            )
+            SELECT r.id, r.parent_id
+            FROM account_financial_report r JOIN tree ON r.id = tree.id
+            ORDER BY r.sequence, r.id""", (tuple(self.ids),))
+        children = defaultdict(list)
+        rank = {}
+        for report_id, parent_id in self.env.cr.fetchall():
+            children[parent_id].append(report_id)
+            rank[report_id] = len(rank)
+
+        def _descendants(report_id, res):
+            for child_id in children[report_id]:
+                res.append(child_id)
+                _descendants(child_id, res)
+            return res
+
+        # the children of all the records are merged and ordered by sequence
+        res = []
+        for child_id in sorted((c for r in self.ids for c in children[r]), key=rank.get):
+            res.append(child_id)
+            _descendants(child_id, res)
+        return self + self.browse(res)
 
     name = fields.Char('Report Name', required=True, translate=True)
     parent_id = fields.Many2one('account.financial.report', 'Parent')
@@ -72,3 +100,15 @@ class AccountFinancialReport(models.Model):
              "financial reports hierarchy (auto-computed field 'level').")
     children_ids = fields.One2many('account.financial.report', 'parent_id', string='Children')
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['account.report.cache']._clear()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env['account.report.cache']._clear()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['account.report.cache']._clear()
+        return super().unlink()
@@ -0,0 +1,12 @@
+from odoo import models
+
+
+class AccountJournal(models.Model):
+    _inherit = "account.journal"
+
+    def write(self, vals):
+        res = super().write(vals)
+        # the cached reports display the code and name of the journals
+        if 'name' in vals or 'code' in vals:
+            self.env['account.report.cache']._clear()
+        return res
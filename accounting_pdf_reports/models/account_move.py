@@ -0,0 +1,19 @@
+from odoo import models
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def write(self, vals):
+        # keep the monthly balance snapshot in line with the posted entries
+        if 'state' not in vals:
+            return super().write(vals)
+        Snapshot = self.env['account.balance.snapshot'].sudo()
+        was_posted = self.filtered(lambda move: move.state == 'posted')
+        Snapshot._apply_moves(was_posted, -1)
+        res = super().write(vals)
+        now_posted = self.filtered(lambda move: move.state == 'posted')
+        Snapshot._apply_moves(now_posted, 1)
+        # outdate the cached reports of the periods of the changed entries
+        self.env['account.report.ledger.version'].sudo()._bump(was_posted ^ now_posted)
+        return res
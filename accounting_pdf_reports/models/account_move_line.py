@@ -1,18 +1,130 @@
 import ast
-from odoo import api, models, fields
+from collections import defaultdict
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, models, fields, tools
+from odoo.tools.misc import format_date
+
+# Context keys read by _query_get, split by the way they are normalized into
+# the cache key of _query_get_compiled.
+QUERY_GET_VALUE_KEYS = (
+    'aged_balance', 'date_from', 'date_to', 'strict_range', 'initial_bal',
+    'state', 'company_id', 'reconcile_date',
+)
+QUERY_GET_RECORDSET_KEYS = (
+    'account_tag_ids', 'account_ids', 'analytic_tag_ids',
+    'analytic_account_ids', 'partner_ids', 'partner_categories',
+)
+
+# Per-process counters of the _query_get compilation cache.
+QUERY_GET_STATS = {'call': 0, 'miss': 0}
+
+# Fields of the move lines the balance snapshot is computed from.
+SNAPSHOT_FIELDS = {
+    'account_id', 'journal_id', 'company_id', 'date', 'debit', 'credit',
+    'balance', 'amount_currency', 'move_id',
+}
+# Fields of the move lines displayed by the cached reports.
+REPORT_FIELDS = SNAPSHOT_FIELDS | {
+    'name', 'ref', 'partner_id', 'currency_id', 'tax_ids', 'tax_line_id',
+    'tax_base_amount', 'analytic_distribution',
+}
 
 
 class AccountMoveLine(models.Model):
     _inherit = "account.move.line"
 
+    def _posted_lines(self):
+        return self.filtered(lambda line: line.parent_state == 'posted')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        posted = lines._posted_lines()
+        self.env['account.balance.snapshot'].sudo()._apply_lines(posted, 1)
+        self.env['account.report.ledger.version'].sudo()._bump(posted.move_id)
+        return lines
+
+    def write(self, vals):
+        # keep the monthly balance snapshot and the cached reports in line
+        # with the posted lines
+        if REPORT_FIELDS.isdisjoint(vals):
+            return super().write(vals)
+        Snapshot = self.env['account.balance.snapshot'].sudo()
+        update_snapshot = not SNAPSHOT_FIELDS.isdisjoint(vals)
+        was_posted = self._posted_lines()
+        if update_snapshot:
+            Snapshot._apply_lines(was_posted, -1)
+        res = super().write(vals)
+        now_posted = self._posted_lines()
+        if update_snapshot:
+            Snapshot._apply_lines(now_posted, 1)
+        self.env['account.report.ledger.version'].sudo()._bump((was_posted | now_posted).move_id)
+        return res
+
+    def unlink(self):
+        posted = self._posted_lines()
+        self.env['account.balance.snapshot'].sudo()._apply_lines(posted, -1)
+        self.env['account.report.ledger.version'].sudo()._bump(posted.move_id)
+        return super().unlink()
+
+    @api.model
+    def _query_get_key(self):
+        """ Normalize the part of the context used by ``_query_get`` into a
+            hashable tuple. """
+        context = self._context or {}
+        key = []
+        for name in QUERY_GET_VALUE_KEYS:
+            value = context.get(name)
+            key.append((name, str(value) if value else False))
+        journal_ids = context.get('journal_ids')
+        key.append(('journal_ids', tuple(sorted(journal_ids)) if journal_ids else False))
+        allowed_company_ids = bool(context.get('allowed_company_ids')) and tuple(self.env.companies.ids)
+        key.append(('allowed_company_ids', allowed_company_ids))
+        for name in QUERY_GET_RECORDSET_KEYS:
+            records = context.get(name)
+            key.append((name, tuple(sorted(records.ids)) if records else False))
+        # the record rules evaluated by _query_get depend on the companies
+        self.env['res.company'].flush_model(['parent_id', 'active'])
+        self.env.cr.execute("SELECT ROW(COUNT(*), MAX(write_date))::text FROM res_company")
+        key.append(('companies_stamp', self.env.cr.fetchone()[0]))
+        return tuple(key)
+
     @api.model
     def _query_get(self, domain=None):
         self.check_access('read')
+        if domain:
+            return self._query_get_uncached(domain)
+        QUERY_GET_STATS['call'] += 1
+        tables, where_clause, where_clause_params = self._query_get_compiled(self._query_get_key())
+        return tables, where_clause, list(where_clause_params)
+
+    @api.model
+    @tools.ormcache('self.env.uid', 'self.env.su', 'tuple(self.env.companies.ids)', 'key')
+    def _query_get_compiled(self, key):
+        """ Cached translation of the report context into SQL. The key
+            changes with the companies, and the cache is dropped with the
+            registry caches when the record rules change. """
+        QUERY_GET_STATS['miss'] += 1
+        tables, where_clause, where_clause_params = self._query_get_uncached()
+        return tables, where_clause, tuple(where_clause_params)
 
+    @api.model
+    def _query_get_cache_stats(self):
+        """ Return the hit/miss counters of the ``_query_get`` cache. """
+        return {
+            'hit': QUERY_GET_STATS['call'] - QUERY_GET_STATS['miss'],
+            'miss': QUERY_GET_STATS['miss'],
+        }
+
+    @api.model
+    def _query_get_uncached(self, domain=None):
         context = dict(self._context or {})
         domain = domain or []
         if not isinstance(domain, (list, tuple)):
             domain = ast.literal_eval(domain)
+        domain = list(domain)
 
         date_field = 'date'
         if context.get('aged_balance'):
@@ -75,3 +187,78 @@ class AccountMoveLine(models.Model):
             where_string, where_params = query.where_clause
             tables, where_clause, where_clause_params = from_string, where_string, from_params + where_params
         return tables, where_clause, where_clause_params
+
+    @api.model
+    def _get_report_periods(self, date_from, date_to, period_split):
+        """ Return the ``(start, label)`` of the months or quarters
+            (``period_split``) covering ``date_from`` to ``date_to``. """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        step = 3 if period_split == 'quarter' else 1
+        start = date_from.replace(month=date_from.month - (date_from.month - 1) % step, day=1)
+        periods = []
+        while start <= date_to:
+            if period_split == 'quarter':
+                label = 'Q%s %s' % ((start.month - 1) // 3 + 1, start.year)
+            else:
+                label = format_date(self.env, start, date_format='MMM yyyy')
+            periods.append((start, label))
+            start += relativedelta(months=step)
+        return periods
+
+    @api.model
+    def _get_period_balances(self, account_ids, period_split):
+        """ Compute the debit, credit and balance of the given accounts per
+            month or quarter (``period_split``) with a single query, using the
+            filters of the current context.
+
+            :returns: a dictionary ``{period_start: {account_id: {'debit': ...,
+                'credit': ..., 'balance': ...}}}``
+        """
+        res = defaultdict(dict)
+        if not account_ids:
+            return res
+        tables, where_clause, where_params = self._query_get()
+        tables = tables.replace('"', '') if tables else 'account_move_line'
+        wheres = [""]
+        if where_clause.strip():
+            wheres.append(where_clause.strip())
+        filters = " AND ".join(wheres)
+        request = ("SELECT account_id AS id, date_trunc(%s, date)::date AS period, "
+                   "COALESCE(SUM(debit), 0) AS debit, COALESCE(SUM(credit), 0) AS credit, "
+                   "COALESCE(SUM(debit), 0) - COALESCE(SUM(credit), 0) AS balance"
+                   " FROM " + tables + " WHERE account_id IN %s " + filters +
+                   " GROUP BY account_id, period")
+        params = ('quarter' if period_split == 'quarter' else 'month', tuple(account_ids)) + tuple(where_params)
+        self.env.cr.execute(request, params)
+        for row in self.env.cr.dictfetchall():
+            res[row.pop('period')][row['id']] = row
+        return res
+
+    @api.model
+    def _get_reconciled_after_clause(self, date, alias='l'):
+        """ Return the SQL condition (and its params) true for the lines
+            ``alias`` having a partial reconciliation after ``date``, i.e.
+            the lines that were still open on ``date`` even if they are
+            reconciled now. """
+        clause = ("""(EXISTS (SELECT 1 FROM account_partial_reconcile p
+                        WHERE p.debit_move_id = {alias}.id AND p.max_date > %s)
+                   OR EXISTS (SELECT 1 FROM account_partial_reconcile p
+                        WHERE p.credit_move_id = {alias}.id AND p.max_date > %s))""").format(alias=alias)
+        return clause, [date, date]
+
+    @api.model
+    def _get_matched_as_of_join(self, date, alias='l'):
+        """ Return the SQL join (and its params) giving, for each line
+            ``alias``, the amounts reconciled with it up to ``date``:
+            ``matched.debit_amount`` as the credit side of partials and
+            ``matched.credit_amount`` as their debit side. The residual of the
+            line on ``date`` is ``balance + debit_amount - credit_amount``.
+        """
+        join = ("""LEFT JOIN LATERAL (
+                    SELECT (SELECT COALESCE(SUM(p.amount), 0.0) FROM account_partial_reconcile p
+                            WHERE p.credit_move_id = {alias}.id AND p.max_date <= %s) AS debit_amount,
+                           (SELECT COALESCE(SUM(p.amount), 0.0) FROM account_partial_reconcile p
+                            WHERE p.debit_move_id = {alias}.id AND p.max_date <= %s) AS credit_amount
+                ) matched ON TRUE""").format(alias=alias)
+        return join, [date, date]
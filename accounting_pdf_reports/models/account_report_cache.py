@@ -0,0 +1,215 @@
+import base64
+import hashlib
+import json
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import date_utils
+from odoo.tools.sql import create_index, drop_constraint
+
+# reports computed from the posted entries only, whose result can be reused
+# as long as no entry is posted or reset in the reported period
+CACHEABLE_REPORTS = {
+    'accounting_pdf_reports.report_general_ledger',
+    'accounting_pdf_reports.report_trial_balance',
+    'accounting_pdf_reports.report_financial',
+    'accounting_pdf_reports.report_tax',
+    'accounting_pdf_reports.report_journal',
+}
+
+# how long a rendered report is kept at most
+REPORT_CACHE_TTL = timedelta(hours=12)
+
+
+class AccountReportLedgerVersion(models.Model):
+    """ Versions of the entries per company and month.
+
+        Every change appends rows instead of incrementing a single row per
+        company and month, so that concurrent postings do not update the
+        same row; the versions of a period are summed when read, and merged
+        by ``_gc_compact_versions``.
+    """
+    _name = "account.report.ledger.version"
+    _description = "Ledger Version per Company and Month"
+    _order = "company_id, month"
+
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True)
+    month = fields.Date(string='Month', required=True, readonly=True)
+    version = fields.Integer(string='Version', readonly=True)
+
+    def init(self):
+        drop_constraint(self.env.cr, self._table, 'account_report_ledger_version_ledger_version_uniq')
+        create_index(self.env.cr, 'account_report_ledger_version_company_month_index', self._table,
+                     ['company_id', 'month'])
+
+    @api.model
+    def _bump(self, moves):
+        """ Increment the version of the months of ``moves``, whose posted
+            lines change. """
+        if not moves:
+            return
+        self.env['account.move'].flush_model(['company_id', 'date'])
+        self.env.cr.execute("""
+            INSERT INTO account_report_ledger_version (company_id, month, version)
+            SELECT DISTINCT company_id, date_trunc('month', date)::date, 1
+            FROM account_move
+            WHERE id IN %s""", (tuple(moves.ids),))
+        self.invalidate_model()
+
+    @api.autovacuum
+    def _gc_compact_versions(self):
+        """ Merge the rows of each company and month into one. """
+        self.env.cr.execute("""
+            WITH merged AS (
+                DELETE FROM account_report_ledger_version
+                WHERE (company_id, month) IN (
+                    SELECT company_id, month
+                    FROM account_report_ledger_version
+                    GROUP BY company_id, month
+                    HAVING COUNT(*) > 1)
+                RETURNING company_id, month, version
+            )
+            INSERT INTO account_report_ledger_version (company_id, month, version)
+            SELECT company_id, month, SUM(version)
+            FROM merged
+            GROUP BY company_id, month""")
+        self.invalidate_model()
+
+    @api.model
+    def _get_version(self, company_ids, date_to=None):
+        """ Return a number that changes whenever an entry dated on or before
+            ``date_to`` (any date when not set) of the companies is posted or
+            reset. """
+        query = "SELECT COALESCE(SUM(version), 0) FROM account_report_ledger_version WHERE company_id IN %s"
+        params = [tuple(company_ids)]
+        if date_to:
+            query += " AND month <= %s"
+            params.append(date_to)
+        self.env.cr.execute(query, params)
+        return self.env.cr.fetchone()[0]
+
+
+class AccountReportCacheGeneration(models.Model):
+    """ Generation of the cached reports, changed when a record they display
+        is renamed.
+
+        A change appends a row, the generation being the last id, so that
+        concurrent changes do not update the same row and the new generation
+        is only seen once the change is committed.
+    """
+    _name = "account.report.cache.generation"
+    _description = "Accounting Report Cache Generation"
+
+    @api.model
+    def _bump(self):
+        self.env.cr.execute("INSERT INTO account_report_cache_generation DEFAULT VALUES")
+
+    @api.model
+    def _get_generation(self):
+        self.env.cr.execute("SELECT COALESCE(MAX(id), 0) FROM account_report_cache_generation")
+        return self.env.cr.fetchone()[0]
+
+    @api.autovacuum
+    def _gc_generations(self):
+        """ Only keep the row of the current generation. """
+        self.env.cr.execute("""
+            DELETE FROM account_report_cache_generation
+            WHERE id < (SELECT MAX(id) FROM account_report_cache_generation)""")
+
+
+class AccountReportCache(models.Model):
+    _name = "account.report.cache"
+    _description = "Rendered Accounting Report Cache"
+
+    key = fields.Char(string='Key', required=True, readonly=True, index=True)
+    ledger_version = fields.Integer(string='Ledger Version', readonly=True)
+    generation = fields.Integer(string='Generation', readonly=True)
+    filename = fields.Char(string='File Name', readonly=True)
+    content = fields.Binary(string='Content', attachment=True, readonly=True)
+
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', 'A report rendering is only cached once.'),
+    ]
+
+    @api.model
+    def _get_key(self, report_name, report_format, res_ids, data):
+        """ Return the cache key of a report rendering, or None when the
+            report cannot be cached. """
+        if report_name not in CACHEABLE_REPORTS or not data or not data.get('form'):
+            return None
+        form = data['form']
+        if form.get('target_move') != 'posted':
+            return None
+        normalized = dict(data, form={key: value for key, value in form.items() if key != 'id'})
+        model = self.env.context.get('active_model')
+        if not model or model not in self.env or self.env[model]._transient:
+            # the records of a wizard are not part of the report
+            res_ids = []
+        payload = json.dumps({
+            'report': report_name,
+            'format': report_format,
+            'res_ids': sorted(res_ids or []),
+            # the content depends on the access rights and record rules
+            'uid': self.env.uid,
+            'su': self.env.su,
+            'companies': sorted(self.env.companies.ids),
+            'lang': self.env.lang,
+            'data': normalized,
+        }, sort_keys=True, default=date_utils.json_default)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @api.model
+    def _get_ledger_date(self, data):
+        """ Return the last date of the entries a report depends on, or None
+            when it depends on entries of any date. """
+        form = data['form']
+        dates = [form.get('date_to')]
+        if form.get('enable_filter') and form.get('filter_cmp') == 'filter_date':
+            dates.append(form.get('date_to_cmp'))
+        if not all(dates):
+            return None
+        return max(fields.Date.to_date(date) for date in dates)
+
+    @api.model
+    def _get_or_render(self, report_name, report_format, res_ids, data, render):
+        """ Return the result of ``render()`` for the given report request,
+            reusing a previous rendering when the entries it depends on did
+            not change since. ``render`` returns ``(content, filename)``. """
+        key = self._get_key(report_name, report_format, res_ids, data)
+        if not key:
+            return render()
+        cache = self.sudo()
+        version = self.env['account.report.ledger.version'].sudo()._get_version(
+            self.env.companies.ids, self._get_ledger_date(data))
+        generation = self.env['account.report.cache.generation'].sudo()._get_generation()
+        entry = cache.search([
+            ('key', '=', key),
+            ('ledger_version', '=', version),
+            ('generation', '=', generation),
+            ('write_date', '>=', fields.Datetime.now() - REPORT_CACHE_TTL),
+        ], limit=1)
+        if entry:
+            return base64.b64decode(entry.with_context(bin_size=False).content), entry.filename
+        content, filename = render()
+        # concurrent renderings of the same report replace the same row
+        self.env.cr.execute("""
+            INSERT INTO account_report_cache
+                (key, ledger_version, generation, filename, create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC', %s, NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (key) DO UPDATE
+            SET ledger_version = EXCLUDED.ledger_version, generation = EXCLUDED.generation,
+                filename = EXCLUDED.filename, write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+            RETURNING id""", (key, version, generation, filename, self.env.uid, self.env.uid))
+        entry = cache.browse(self.env.cr.fetchone()[0])
+        entry.invalidate_recordset()
+        entry.content = base64.b64encode(content)
+        return content, filename
+
+    @api.model
+    def _clear(self):
+        """ Outdate every cached report, e.g. when a displayed name changes. """
+        self.env['account.report.cache.generation'].sudo()._bump()
+
+    @api.autovacuum
+    def _gc_report_cache(self):
+        self.sudo().search([('write_date', '<', fields.Datetime.now() - REPORT_CACHE_TTL)]).unlink()
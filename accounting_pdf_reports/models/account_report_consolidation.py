@@ -0,0 +1,113 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# maximum number of companies computed at the same time, each one holds a
+# database connection while its balances are computed
+CONSOLIDATION_WORKERS = 4
+
+
+class AccountReportConsolidation(models.AbstractModel):
+    """ Consolidated account balances of the allowed companies.
+
+        The balances of each company are computed by a worker thread on its
+        own cursor, so that the companies are read in parallel, then they are
+        translated into the currency of the current company at the closing
+        rate and summed per account code: the companies with their own chart
+        of accounts have distinct accounts, matched on the code of the
+        displayed ones. The workers only see the committed entries.
+    """
+    _name = 'account.report.consolidation'
+    _description = 'Consolidated Report Balances'
+
+    @api.model
+    def _get_worker_context(self, company_id):
+        context = dict(self.env.context, company_id=company_id, allowed_company_ids=[company_id])
+        context.pop('consolidate', None)
+        return context
+
+    @api.model
+    def _compute_company_balances(self, codes):
+        """ Return ``{code: (debit, credit)}`` for the accounts of the company
+            of the context having one of ``codes``, in its currency. """
+        Account = self.env['account.account']
+        accounts = Account.search([
+            ('code', 'in', codes),
+            *Account._check_company_domain(self.env.company),
+        ])
+        balances = self.env['report.accounting_pdf_reports.report_financial']._compute_account_balance(accounts)
+        res = {}
+        for account in accounts:
+            value = balances.get(account.id)
+            if value and (value['debit'] or value['credit']):
+                debit, credit = res.get(account.code, (0.0, 0.0))
+                res[account.code] = (debit + value['debit'], credit + value['credit'])
+        return res
+
+    def _compute_company_balances_worker(self, company_id, codes):
+        """ Same as ``_compute_company_balances`` for ``company_id``, run in a
+            thread with a new cursor. """
+        with self.env.registry.cursor(readonly=True) as cr:
+            env = api.Environment(cr, self.env.uid, self._get_worker_context(company_id), su=self.env.su)
+            return env[self._name]._compute_company_balances(codes)
+
+    @api.model
+    def _get_displayed_accounts(self, accounts):
+        """ Return one account of ``accounts`` per code, the one of the
+            current company when it has one, as the balances are consolidated
+            per code. """
+        company = self.env.company
+        displayed = {}
+        for account in accounts:
+            current = displayed.get(account.code)
+            if current is None or (company not in current.company_ids and company in account.company_ids):
+                displayed[account.code] = account
+        displayed_ids = {account.id for account in displayed.values()}
+        return accounts.filtered(lambda account: account.id in displayed_ids)
+
+    @api.model
+    def _get_balances(self, account_ids):
+        """ Return ``{account_id: {'debit': ..., 'credit': ..., 'balance': ...}}``
+            for the filters of the context, summed over the allowed companies
+            and expressed in the currency of the current company. Only one
+            account per code gets the total, see ``_get_displayed_accounts``.
+        """
+        res = {}
+        companies = self.env.companies
+        if not account_ids:
+            return res
+        accounts = self._get_displayed_accounts(self.env['account.account'].browse(account_ids))
+        codes = list({account.code for account in accounts if account.code})
+        if len(companies) == 1 or self.env.registry.in_test_mode():
+            # a test cursor cannot be shared between threads
+            results = [
+                self.with_context(self._get_worker_context(company.id))._compute_company_balances(codes)
+                for company in companies
+            ]
+        else:
+            self.env.flush_all()
+            with ThreadPoolExecutor(max_workers=min(len(companies), CONSOLIDATION_WORKERS)) as executor:
+                results = list(executor.map(
+                    lambda company_id: self._compute_company_balances_worker(company_id, codes),
+                    companies.ids,
+                ))
+            _logger.info("Consolidated balances of %s companies computed in parallel", len(companies))
+
+        currency = self.env.company.currency_id
+        date = fields.Date.to_date(self.env.context.get('date_to')) or fields.Date.context_today(self)
+        rate_cache = self.env['res.currency']._get_report_rate_cache()
+        totals = {}
+        for company, balances in zip(companies, results):
+            for code, (debit, credit) in balances.items():
+                value = totals.setdefault(code, {'debit': 0.0, 'credit': 0.0, 'balance': 0.0})
+                value['debit'] += rate_cache.convert(debit, company.currency_id, currency, self.env.company, date)
+                value['credit'] += rate_cache.convert(credit, company.currency_id, currency, self.env.company, date)
+                value['balance'] = value['debit'] - value['credit']
+        # map the totals back onto the displayed accounts
+        for account in accounts:
+            if account.code in totals:
+                res[account.id] = dict(totals[account.code])
+        return res
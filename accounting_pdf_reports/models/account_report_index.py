@@ -0,0 +1,226 @@
+import json
+import logging
+from contextlib import closing, contextmanager
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, _
+from odoo.sql_db import db_connect
+from odoo.tools.sql import index_exists
+
+_logger = logging.getLogger(__name__)
+
+# (index name, table, expressions, where) of the optional indexes matching
+# the filters and sort orders of the report queries
+REPORT_INDEXES = [
+    ('account_move_line_report_account_date_index', 'account_move_line',
+     ['account_id', 'date', 'move_id'], ''),
+    ('account_move_line_report_partner_index', 'account_move_line',
+     ['partner_id', 'account_id', 'full_reconcile_id'], ''),
+    ('account_move_line_report_maturity_index', 'account_move_line',
+     ['(COALESCE(date_maturity, date))'], ''),
+    ('account_move_line_report_tax_line_index', 'account_move_line',
+     ['tax_line_id'], 'tax_line_id IS NOT NULL'),
+    ('account_partial_reconcile_report_max_date_index', 'account_partial_reconcile',
+     ['max_date'], ''),
+]
+
+# pending operation on the report indexes, run by the scheduled action
+INDEX_OPERATION_PARAM = 'accounting_pdf_reports.report_indexes_operation'
+
+# number of partners the aged balance plan is explained for
+PARTNER_SAMPLE_SIZE = 100
+
+# tables whose sequential scan is flagged by the query advisor
+LARGE_TABLES = {'account_move_line', 'account_move', 'account_partial_reconcile',
+                'account_move_line_account_tax_rel'}
+
+
+class AccountReportIndexAdvisor(models.AbstractModel):
+    """ Optional indexes of the report queries, and their query plans.
+
+        The indexes are built with ``CREATE INDEX CONCURRENTLY``, which does
+        not lock the move lines during the build but cannot run inside a
+        transaction: the menus only queue the operation for a scheduled
+        action, which runs it on a dedicated connection in autocommit mode.
+        From a shell, ``_create_report_indexes`` and ``_drop_report_indexes``
+        can be called directly once the shell transaction is committed.
+    """
+    _name = 'account.report.index.advisor'
+    _description = 'Accounting Report Index Advisor'
+
+    @contextmanager
+    def _autocommit_cursor(self):
+        """ Yield a cursor on a new connection to the database, outside of
+            any transaction. """
+        with closing(db_connect(self.env.cr.dbname).cursor()) as cr:
+            cr._cnx.autocommit = True
+            try:
+                yield cr
+            finally:
+                cr._cnx.autocommit = False
+
+    @api.model
+    def _create_report_indexes(self):
+        """ Create the optional indexes of the report queries without locking
+            the tables; an invalid index left by an interrupted build is
+            rebuilt. The build waits for the transactions started before it,
+            so the current one must be committed first. """
+        with self._autocommit_cursor() as cr:
+            cr.execute("""
+                SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname IN %s AND NOT i.indisvalid
+            """, [tuple(name for name, table, expressions, where in REPORT_INDEXES)])
+            invalid = {name for (name,) in cr.fetchall()}
+            for name, table, expressions, where in REPORT_INDEXES:
+                if name in invalid:
+                    cr.execute('DROP INDEX CONCURRENTLY IF EXISTS "%s"' % name)
+                elif index_exists(cr, name):
+                    continue
+                _logger.info("Creating report index %s on %s", name, table)
+                cr.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS "%s" ON "%s" (%s)%s' % (
+                    name, table, ', '.join(expressions), ' WHERE %s' % where if where else ''))
+
+    @api.model
+    def _drop_report_indexes(self):
+        """ Drop the optional indexes of the report queries without locking
+            the tables; the current transaction must be committed first. """
+        with self._autocommit_cursor() as cr:
+            for name, table, expressions, where in REPORT_INDEXES:
+                cr.execute('DROP INDEX CONCURRENTLY IF EXISTS "%s"' % name)
+
+    @api.model
+    def _queue_report_indexes(self, operation):
+        """ Queue the creation or the removal of the report indexes for the
+            scheduled action. """
+        self.env['ir.config_parameter'].sudo().set_param(INDEX_OPERATION_PARAM, operation)
+        self.env.ref('accounting_pdf_reports.ir_cron_account_report_indexes')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Report Indexes"),
+                'message': _("The indexes will be updated in the background."),
+                'type': 'info',
+            },
+        }
+
+    @api.model
+    def action_create_report_indexes(self):
+        return self._queue_report_indexes('create')
+
+    @api.model
+    def action_drop_report_indexes(self):
+        return self._queue_report_indexes('drop')
+
+    @api.model
+    def _cron_update_report_indexes(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        operation = ICP.get_param(INDEX_OPERATION_PARAM)
+        if not operation:
+            return
+        ICP.set_param(INDEX_OPERATION_PARAM, False)
+        # the concurrent build would wait for the snapshot of this transaction
+        self.env.cr.commit()
+        if operation == 'create':
+            self._create_report_indexes()
+        elif operation == 'drop':
+            self._drop_report_indexes()
+
+    @api.model
+    def _get_report_queries(self):
+        """ Return ``[(name, query, params)]``, the queries built by the
+            reports for the posted entries of the last year of the current
+            company. """
+        date_to = fields.Date.context_today(self)
+        date_from = date_to - relativedelta(years=1)
+        used_context = {
+            'date_from': date_from, 'date_to': date_to, 'state': 'posted', 'strict_range': True,
+            'company_id': self.env.company.id, 'journal_ids': self.env['account.journal'].search([]).ids,
+        }
+        account_ids = self.env['account.account'].search([]).ids or [0]
+        partner_types = ['asset_receivable', 'liability_payable']
+
+        ledger = self.env['account.report.ledger'].with_context(used_context)
+        filters, params = ledger._get_move_line_filters()
+        queries = [(
+            _("General Ledger"),
+            ledger._get_move_lines_query(filters, ledger._get_sort_clause('sort_date')),
+            (tuple(account_ids),) + tuple(params),
+        )]
+
+        trial_balance = self.env['report.accounting_pdf_reports.report_trialbalance'].with_context(used_context)
+        queries.append((_("Trial Balance"),) + trial_balance._get_accounts_query(account_ids))
+
+        tax_report = self.env['report.accounting_pdf_reports.report_tax'].with_context(used_context)
+        queries.append((_("Tax Report"),) + tax_report._get_amls_query())
+
+        partner_ledger = self.env['report.accounting_pdf_reports.report_partnerledger']
+        data = {
+            'form': {'used_context': used_context, 'reconciled': False},
+            'computed': {
+                'move_state': ['posted'],
+                'account_ids': self.env['account.account'].search([('account_type', 'in', partner_types)]).ids or [0],
+            },
+        }
+        for query, params in partner_ledger._get_partner_ledger_queries(data):
+            queries.append((_("Partner Ledger"), query, tuple(params)))
+
+        aged = self.env['report.accounting_pdf_reports.report_agedpartnerbalance']
+        partner_ids = self.env['res.partner'].search([], limit=PARTNER_SAMPLE_SIZE).ids or [0]
+        queries.append((_("Aged Partner Balance"),) + aged._get_aged_lines_query(
+            partner_types, partner_ids, date_to, ['posted'], self.env.company.ids,
+            aged._get_periods(date_to, 30)))
+        return queries
+
+    @api.model
+    def _get_seq_scans(self, plan):
+        """ Return the large tables read by a sequential scan in ``plan``, a
+            node of an ``EXPLAIN (FORMAT JSON)`` output. """
+        tables = set()
+        if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in LARGE_TABLES:
+            tables.add(plan['Relation Name'])
+        for child in plan.get('Plans', []):
+            tables |= self._get_seq_scans(child)
+        return tables
+
+    @api.model
+    def _explain_report_queries(self):
+        """ Run ``EXPLAIN`` on the report queries against the current database
+            and return ``[{'name', 'cost', 'seq_scans'}]``; the sequential
+            scans of large tables are logged as warnings. """
+        self.env['account.move.line'].check_access('read')
+        self.env['account.move.line'].flush_model()
+        result = []
+        for name, query, params in self._get_report_queries():
+            self.env.cr.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = self.env.cr.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            plan = plan[0]['Plan']
+            seq_scans = sorted(self._get_seq_scans(plan))
+            if seq_scans:
+                _logger.warning("%s: sequential scan on %s", name, ', '.join(seq_scans))
+            result.append({'name': name, 'cost': plan.get('Total Cost'), 'seq_scans': seq_scans})
+        return result
+
+    @api.model
+    def action_explain_report_queries(self):
+        results = self._explain_report_queries()
+        lines = []
+        for res in results:
+            if res['seq_scans']:
+                lines.append(_("%(name)s: sequential scan on %(tables)s (cost %(cost)s)",
+                               name=res['name'], tables=', '.join(res['seq_scans']), cost=res['cost']))
+            else:
+                lines.append(_("%(name)s: indexed (cost %(cost)s)", name=res['name'], cost=res['cost']))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Report Query Plans"),
+                'message': '\n'.join(lines),
+                'sticky': True,
+                'type': 'warning' if any(res['seq_scans'] for res in results) else 'success',
+            },
+        }
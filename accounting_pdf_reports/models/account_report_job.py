@@ -0,0 +1,134 @@
+import json
+import logging
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import date_utils
+
+_logger = logging.getLogger(__name__)
+
+# keys of the report action context kept to render the report later
+JOB_CONTEXT_KEYS = ('active_model', 'active_id', 'active_ids', 'landscape', 'lang', 'tz', 'discard_logo_check')
+
+
+class AccountReportJob(models.Model):
+    _name = "account.report.job"
+    _description = "Accounting Report Generation Job"
+    _order = "id desc"
+
+    name = fields.Char(string='Report', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='User', required=True, readonly=True,
+                              default=lambda self: self.env.user, index=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True,
+                                 default=lambda self: self.env.company)
+    company_ids = fields.Many2many('res.company', string='Allowed Companies', readonly=True,
+                                   default=lambda self: self.env.companies)
+    report_name = fields.Char(string='Technical Report Name', required=True, readonly=True)
+    report_format = fields.Selection([('pdf', 'PDF'), ('xlsx', 'XLSX')], string='Format',
+                                     required=True, default='pdf', readonly=True)
+    report_data = fields.Json(string='Report Data', readonly=True)
+    report_context = fields.Json(string='Report Context', readonly=True)
+    state = fields.Selection([('queued', 'Queued'), ('running', 'Running'),
+                              ('done', 'Done'), ('failed', 'Failed')],
+                             string='Status', required=True, default='queued', readonly=True, index=True)
+    progress = fields.Float(string='Progress', readonly=True, help="Percentage of the generation done.")
+    attachment_id = fields.Many2one('ir.attachment', string='Result', readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.model
+    def _enqueue(self, action, report_format='pdf'):
+        """ Queue the rendering of the report ``action`` returned by the
+            ``check_report`` of a wizard. """
+        if action.get('type') != 'ir.actions.report':
+            raise UserError(_("This report cannot be generated in the background."))
+        context = action.get('context') or {}
+        # the jobs are only read by their users, the rendering checks the
+        # access rights of the user
+        job = self.sudo().create({
+            'name': action.get('name') or action['report_name'],
+            'user_id': self.env.uid,
+            'company_id': self.env.company.id,
+            'company_ids': [(6, 0, self.env.companies.ids)],
+            'report_name': action['report_name'],
+            'report_format': report_format,
+            # serialized as the web client does, dates become strings
+            'report_data': json.loads(json.dumps(action.get('data'), default=date_utils.json_default)),
+            'report_context': {key: context[key] for key in JOB_CONTEXT_KEYS if key in context},
+        })
+        self.env.ref('accounting_pdf_reports.ir_cron_account_report_job').sudo()._trigger()
+        return self.browse(job.id)
+
+    def _set_progress(self, progress, **values):
+        self.sudo().write(dict(values, progress=progress))
+        self.env.cr.commit()
+
+    def _render(self):
+        """ Render the report of the job with the rights of its user, and
+            return ``(content, filename, mimetype)``. """
+        self.ensure_one()
+        context = dict(self.report_context or {}, allowed_company_ids=self.company_ids.ids or self.company_id.ids)
+        env = self.env(user=self.user_id.id, context=context, su=False)
+        action = {
+            'report_name': self.report_name,
+            'data': self.report_data,
+            'context': context,
+        }
+        if self.report_format == 'xlsx':
+            content, filename = env['account.report.xlsx']._render_xlsx(action)
+            return content, filename, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        content, content_type = env['ir.actions.report']._render_qweb_pdf(
+            self.report_name, res_ids=context.get('active_ids'), data=self.report_data)
+        return content, '%s.pdf' % self.name, 'application/pdf'
+
+    def _notify_user(self):
+        self.ensure_one()
+        if self.state == 'done':
+            message = _("%s is ready.", self.name)
+            notification_type = 'success'
+        else:
+            message = _("%s could not be generated.", self.name)
+            notification_type = 'danger'
+        self.user_id.partner_id._bus_send('simple_notification', {
+            'type': notification_type,
+            'title': _("Accounting Report"),
+            'message': message,
+        })
+
+    def _run(self):
+        self.ensure_one()
+        self._set_progress(10.0, state='running', error=False)
+        try:
+            content, filename, mimetype = self._render()
+            self._set_progress(80.0)
+            attachment = self.env['ir.attachment'].sudo().create({
+                'name': filename,
+                'raw': content,
+                'mimetype': mimetype,
+                'res_model': self._name,
+                'res_id': self.id,
+            })
+            self._set_progress(100.0, state='done', attachment_id=attachment.id)
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception("Accounting report job %s failed", self.id)
+            self._set_progress(0.0, state='failed', error=str(e))
+        self._notify_user()
+
+    @api.model
+    def _cron_process_jobs(self, limit=10):
+        jobs = self.search([('state', '=', 'queued')], order='id', limit=limit)
+        for index, job in enumerate(jobs):
+            job._run()
+            self.env['ir.cron']._notify_progress(done=index + 1, remaining=len(jobs) - index - 1)
+        if self.search_count([('state', '=', 'queued')], limit=1):
+            self.env.ref('accounting_pdf_reports.ir_cron_account_report_job')._trigger()
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError(_("The report has not been generated yet."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
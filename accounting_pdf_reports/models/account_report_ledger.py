@@ -0,0 +1,268 @@
+import uuid
+from itertools import groupby
+
+from odoo import api, models
+
+# Number of rows pulled from the server-side cursor per round trip when the
+# ledger is streamed.
+STREAM_FETCH_SIZE = 2000
+
+
+class AccountReportLedger(models.AbstractModel):
+    """ Ledger queries shared by the General Ledger and the daily books.
+
+        The move lines of a set of accounts are read with the filters of the
+        context (see ``account.move.line._query_get``), with an optional
+        initial balance line and a running balance per account.
+    """
+    _name = 'account.report.ledger'
+    _description = 'Ledger Report Engine'
+
+    @api.model
+    def _get_move_line_filters(self, analytic_account_ids=False, partner_ids=False,
+                               initial_bal=False):
+        """ Return the WHERE fragment (aliased on ``l``/``m``) and its params
+            built by ``_query_get`` for the current report context.
+        """
+        context = dict(self.env.context)
+        if initial_bal:
+            context['date_to'] = False
+            context['initial_bal'] = True
+        if analytic_account_ids:
+            context['analytic_account_ids'] = analytic_account_ids
+        if partner_ids:
+            context['partner_ids'] = partner_ids
+        tables, where_clause, where_params = self.env['account.move.line'].with_context(context)._query_get()
+        wheres = [""]
+        if where_clause.strip():
+            wheres.append(where_clause.strip())
+        filters = " AND ".join(wheres)
+        filters = filters.replace('account_move_line__move_id', 'm').replace('account_move_line', 'l')
+        return filters, list(where_params)
+
+    @api.model
+    def _get_account_totals(self, accounts, filters, params):
+        """ Return ``{account_id: (debit, credit)}`` for the given filters. """
+        sql = ("""SELECT l.account_id, COALESCE(SUM(l.debit), 0.0),
+                COALESCE(SUM(l.credit), 0.0)
+            FROM account_move_line l
+            JOIN account_move m ON (l.move_id=m.id)
+            JOIN account_journal j ON (l.journal_id=j.id)
+            WHERE l.account_id IN %s""" + filters + ' GROUP BY l.account_id')
+        self.env.cr.execute(sql, (tuple(accounts.ids),) + tuple(params))
+        return {account_id: (debit, credit) for account_id, debit, credit in self.env.cr.fetchall()}
+
+    @api.model
+    def _get_initial_totals(self, accounts, analytic_account_ids=False, partner_ids=False):
+        """ Return ``{account_id: (debit, credit)}`` before ``date_from``,
+            read from the balance snapshot when it can answer the filters.
+        """
+        if not analytic_account_ids and not partner_ids:
+            snapshot_totals = self.env['account.balance.snapshot'].with_context(
+                date_to=False, initial_bal=True)._get_balances(accounts.ids)
+            if snapshot_totals is not None:
+                return {
+                    account_id: (value['debit'], value['credit'])
+                    for account_id, value in snapshot_totals.items()
+                }
+        init_filters, init_params = self._get_move_line_filters(
+            analytic_account_ids, partner_ids, initial_bal=True)
+        return self._get_account_totals(accounts, init_filters, init_params)
+
+    @api.model
+    def _get_initial_balance_line(self, debit, credit):
+        """ Return the 'Initial Balance' row of an account, with the keys of
+            the move line rows. """
+        return {
+            'lid': 0, 'ldate': '', 'lcode': '', 'amount_currency': 0.0,
+            'analytic_account_id': '', 'lref': '', 'lname': 'Initial Balance',
+            'debit': debit, 'credit': credit, 'balance': debit - credit,
+            'lpartner_id': '', 'move_name': '', 'move_id': '',
+            'currency_code': '', 'currency_id': None, 'invoice_id': '',
+            'invoice_type': '', 'invoice_number': '', 'partner_name': '',
+        }
+
+    @api.model
+    def _fetch_stream(self, sql, params, size=STREAM_FETCH_SIZE):
+        """ Execute ``sql`` through a server-side cursor and yield its rows as
+            dictionaries, fetching ``size`` rows per round trip.
+        """
+        cr = self.env.cr
+        name = 'ledger_stream_%s' % uuid.uuid4().hex
+        cr.execute('DECLARE %s NO SCROLL CURSOR FOR %s' % (name, sql), params)
+        try:
+            while True:
+                cr.execute('FETCH FORWARD %s FROM %s' % (int(size), name))
+                rows = cr.dictfetchall()
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cr.execute('CLOSE %s' % name)
+
+    def _get_sort_clause(self, sortby):
+        if sortby == 'sort_journal_partner':
+            return 'j.code, p.name, l.move_id'
+        return 'l.date, l.move_id'
+
+    def _get_move_lines_query(self, filters, sql_sort, order_by_accounts=False):
+        """ Return the query of the move lines of the accounts given as first
+            parameter. With ``order_by_accounts``, the rows are ordered along
+            the array given as last parameter, and the running balance is
+            left to the caller. """
+        balance = '''SUM(COALESCE(l.debit,0) - COALESCE(l.credit,0)) OVER (
+                PARTITION BY l.account_id ORDER BY ''' + sql_sort + ''', l.id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS balance,'''
+        order = sql_sort + ', l.id'
+        if order_by_accounts:
+            balance = ''
+            order = 'array_position(%s, l.account_id), ' + order
+        return ('''SELECT l.id AS lid, l.account_id AS account_id,
+            l.date AS ldate, j.code AS lcode, l.currency_id,
+            l.amount_currency, '' AS analytic_account_id,
+            l.ref AS lref, l.name AS lname, COALESCE(l.debit,0) AS debit,
+            COALESCE(l.credit,0) AS credit, ''' + balance + '''
+            m.name AS move_name, c.symbol AS currency_code,
+            p.name AS partner_name
+            FROM account_move_line l
+            JOIN account_move m ON (l.move_id=m.id)
+            LEFT JOIN res_currency c ON (l.currency_id=c.id)
+            LEFT JOIN res_partner p ON (l.partner_id=p.id)
+            JOIN account_journal j ON (l.journal_id=j.id)
+            WHERE l.account_id IN %s ''' + filters + '''
+            ORDER BY ''' + order)
+
+    @api.model
+    def _get_ledger(self, accounts, init_balance, sortby, display_account,
+                    analytic_account_ids=False, partner_ids=False):
+        """
+        :param:
+                accounts: the recordset of accounts
+                init_balance: boolean value of initial_balance
+                sortby: sorting by date or partner and journal
+                display_account: type of account(receivable, payable and both)
+                analytic_account_ids: the recordset of analytic accounts
+                partner_ids: the recordset of partners
+
+        Returns a list of accounts with following key and value {
+                'code': account code,
+                'name': account name,
+                'debit': sum of total debit amount,
+                'credit': sum of total credit amount,
+                'balance': total balance,
+                'move_lines': list of move line
+        }
+        """
+        move_lines = {x: [] for x in accounts.ids}
+        if not accounts:
+            return []
+
+        init_totals = {}
+        if init_balance:
+            init_totals = self._get_initial_totals(accounts, analytic_account_ids, partner_ids)
+        for account_id, (debit, credit) in init_totals.items():
+            move_lines[account_id].append(self._get_initial_balance_line(debit, credit))
+
+        # Get move lines base on sql query; the running balance of each
+        # account is computed by the window function, the initial balance
+        # is added afterwards.
+        filters, where_params = self._get_move_line_filters(analytic_account_ids, partner_ids)
+        sql = self._get_move_lines_query(filters, self._get_sort_clause(sortby))
+        self.env.cr.execute(sql, (tuple(accounts.ids),) + tuple(where_params))
+        for row in self.env.cr.dictfetchall():
+            account_id = row.pop('account_id')
+            init_debit, init_credit = init_totals.get(account_id, (0.0, 0.0))
+            row['balance'] += init_debit - init_credit
+            move_lines[account_id].append(row)
+
+        # Calculate the debit, credit and balance for Accounts
+        account_res = []
+        for account in accounts:
+            currency = account.currency_id and account.currency_id or self.env.company.currency_id
+            res = dict((fn, 0.0) for fn in ['credit', 'debit', 'balance'])
+            res['code'] = account.code
+            res['name'] = account.name
+            res['move_lines'] = move_lines[account.id]
+            for line in res.get('move_lines'):
+                res['debit'] += line['debit']
+                res['credit'] += line['credit']
+                res['balance'] = line['balance']
+            if display_account == 'all':
+                account_res.append(res)
+            if display_account == 'movement' and res.get('move_lines'):
+                account_res.append(res)
+            if display_account == 'not_zero' and not currency.is_zero(res['balance']):
+                account_res.append(res)
+        return account_res
+
+    @api.model
+    def _iter_ledger(self, accounts, init_balance, sortby, display_account,
+                     analytic_account_ids=False, partner_ids=False):
+        """ Streaming counterpart of ``_get_ledger``.
+
+            Account totals come from grouped queries, then the move lines are
+            read through a server-side cursor, ``STREAM_FETCH_SIZE`` rows at a
+            time. Yields one dictionary per account with the same keys as
+            ``_get_ledger``, except that ``move_lines`` is a generator that
+            must be consumed before the next account is requested.
+        """
+        if not accounts:
+            return
+        filters, where_params = self._get_move_line_filters(analytic_account_ids, partner_ids)
+        totals = self._get_account_totals(accounts, filters, where_params)
+        init_totals = {}
+        if init_balance:
+            init_totals = self._get_initial_totals(accounts, analytic_account_ids, partner_ids)
+
+        sections = []
+        for account in accounts:
+            currency = account.currency_id and account.currency_id or self.env.company.currency_id
+            init_debit, init_credit = init_totals.get(account.id, (0.0, 0.0))
+            debit, credit = totals.get(account.id, (0.0, 0.0))
+            res = {
+                'code': account.code,
+                'name': account.name,
+                'debit': init_debit + debit,
+                'credit': init_credit + credit,
+                'balance': init_debit + debit - init_credit - credit,
+            }
+            if display_account == 'movement' and account.id not in totals and account.id not in init_totals:
+                continue
+            if display_account == 'not_zero' and currency.is_zero(res['balance']):
+                continue
+            sections.append((account, res))
+
+        account_ids = [account.id for account, res in sections if account.id in totals]
+        rows = iter(())
+        if account_ids:
+            sql = self._get_move_lines_query(filters, self._get_sort_clause(sortby), order_by_accounts=True)
+            params = (tuple(account_ids),) + tuple(where_params) + (account_ids,)
+            rows = self._fetch_stream(sql, params)
+        groups = groupby(rows, key=lambda row: row['account_id'])
+
+        def _move_lines(account, group):
+            balance = 0.0
+            if account.id in init_totals:
+                init_line = self._get_initial_balance_line(*init_totals[account.id])
+                balance = init_line['balance']
+                yield init_line
+            for row in group:
+                row.pop('account_id')
+                balance += row['debit'] - row['credit']
+                row['balance'] = balance
+                yield row
+
+        # groupby() skips whatever the caller left unread in a section as
+        # soon as the next group is requested.
+        current = next(groups, None) if account_ids else None
+        try:
+            for account, res in sections:
+                matched = current is not None and current[0] == account.id
+                group = current[1] if matched else iter(())
+                res['move_lines'] = _move_lines(account, group)
+                yield res
+                if matched:
+                    current = next(groups, None)
+        finally:
+            if account_ids:
+                rows.close()
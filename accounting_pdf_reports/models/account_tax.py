@@ -0,0 +1,12 @@
+from odoo import models
+
+
+class AccountTax(models.Model):
+    _inherit = "account.tax"
+
+    def write(self, vals):
+        res = super().write(vals)
+        # the cached reports display the name of the taxes
+        if 'name' in vals:
+            self.env['account.report.cache']._clear()
+        return res
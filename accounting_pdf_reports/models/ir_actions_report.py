@@ -0,0 +1,20 @@
+from odoo import models
+
+from .account_report_cache import CACHEABLE_REPORTS
+
+
+class IrActionsReport(models.Model):
+    _inherit = "ir.actions.report"
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        report = self._get_report(report_ref)
+        if report.report_name not in CACHEABLE_REPORTS:
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+
+        def render():
+            content, dummy = super(IrActionsReport, self)._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+            return content, '%s.pdf' % report.name
+
+        content, filename = self.env['account.report.cache']._get_or_render(
+            report.report_name, 'pdf', res_ids, data, render)
+        return content, 'pdf'
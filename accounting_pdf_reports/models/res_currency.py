@@ -0,0 +1,48 @@
+from odoo import api, fields, models
+
+
+class CurrencyRateCache:
+    """ Conversion rates memoized for the duration of a transaction.
+
+        Rates are keyed on ``(from_currency, to_currency, company, date)``.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.rates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_rate(self, from_currency, to_currency, company, date):
+        date = fields.Date.to_date(date)
+        key = (from_currency.id, to_currency.id, company.id, date)
+        if key in self.rates:
+            self.hits += 1
+            return self.rates[key]
+        self.misses += 1
+        rate = self.env['res.currency']._get_conversion_rate(from_currency, to_currency, company, date)
+        self.rates[key] = rate
+        return rate
+
+    def convert(self, amount, from_currency, to_currency, company, date):
+        """ Same as ``res.currency._convert`` with ``round=True``. """
+        if from_currency == to_currency:
+            return to_currency.round(amount)
+        return to_currency.round(amount * self.get_rate(from_currency, to_currency, company, date))
+
+    def stats(self):
+        return {'hit': self.hits, 'miss': self.misses}
+
+
+class ResCurrency(models.Model):
+    _inherit = "res.currency"
+
+    @api.model
+    def _get_report_rate_cache(self):
+        """ Return the rate cache shared by the reports of the current
+            transaction. It is kept in the precommit data of the cursor, which
+            is cleared when the transaction ends. """
+        data = self.env.cr.precommit.data
+        if 'accounting_pdf_reports.rate_cache' not in data:
+            data['accounting_pdf_reports.rate_cache'] = CurrencyRateCache(self.env)
+        return data['accounting_pdf_reports.rate_cache']
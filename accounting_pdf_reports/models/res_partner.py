@@ -0,0 +1,12 @@
+from odoo import models
+
+
+class ResPartner(models.Model):
+    _inherit = "res.partner"
+
+    def write(self, vals):
+        res = super().write(vals)
+        # the cached reports display the name of the partners
+        if 'name' in vals:
+            self.env['account.report.cache']._clear()
+        return res
@@ -10,12 +10,7 @@ class ReportAgedPartnerBalance(models.AbstractModel):
     _name = 'report.accounting_pdf_reports.report_agedpartnerbalance'
     _description = 'Aged Partner Balance Report'
 
-    def _get_partner_move_lines(self, account_type, partner_ids,
-                                date_from, target_move, period_length):
-        # This method can receive the context key 'include_nullified_amount' {Boolean}
-        # Do an invoice and a payment and unreconcile. The amount will be nullified
-        # By default, the partner wouldn't appear in this report.
-        # The context key allow it to appear
+    def _get_periods(self, date_from, period_length):
         # In case of a period_length of 30 days as of 2019-02-08, we want the following periods:
         # Name       Stop         Start
         # 1 - 30   : 2019-02-07 - 2019-01-09
@@ -25,7 +20,6 @@ class ReportAgedPartnerBalance(models.AbstractModel):
         # +120     : 2018-10-10
         periods = {}
         start = datetime.strptime(str(date_from), "%Y-%m-%d")
-        date_from = datetime.strptime(str(date_from), "%Y-%m-%d").date()
         for i in range(5)[::-1]:
             stop = start - relativedelta(days=period_length)
             period_name = str((5-(i+1)) * period_length + 1) + '-' + str((5-i) * period_length)
@@ -38,6 +32,56 @@ class ReportAgedPartnerBalance(models.AbstractModel):
                 'start': (i!=0 and stop.strftime('%Y-%m-%d') or False),
             }
             start = stop
+        return periods
+
+    def _get_aged_lines_query(self, account_type, partner_ids, date_from, move_state, company_ids, periods):
+        """ Return the query (and its params) of the lines open on
+            ``date_from`` with their period and the amounts matched up to it. """
+        MoveLine = self.env['account.move.line']
+        reconciled_after_clause, reconciled_after_args = MoveLine._get_reconciled_after_clause(date_from)
+        reconciliation_clause = '(l.reconciled IS FALSE OR ' + reconciled_after_clause + ')'
+        period_case = 'CASE WHEN COALESCE(l.date_maturity, l.date) >= %s THEN 6'
+        period_args = (date_from,)
+        for i in range(5)[::-1]:
+            period = periods[str(i)]
+            if period['start'] and period['stop']:
+                period_case += ' WHEN COALESCE(l.date_maturity, l.date) BETWEEN %s AND %s THEN ' + str(i + 1)
+                period_args += (period['start'], period['stop'])
+            elif period['start']:
+                period_case += ' WHEN COALESCE(l.date_maturity, l.date) >= %s THEN ' + str(i + 1)
+                period_args += (period['start'],)
+            else:
+                period_case += ' WHEN COALESCE(l.date_maturity, l.date) <= %s THEN ' + str(i + 1)
+                period_args += (period['stop'],)
+        period_case += ' END'
+        matched_join, matched_args = MoveLine._get_matched_as_of_join(date_from)
+        query = '''SELECT l.id, l.partner_id, l.company_id, l.balance,
+                    matched.debit_amount AS matched_debit_amount,
+                    matched.credit_amount AS matched_credit_amount,
+                    ''' + period_case + ''' AS period
+                FROM account_move_line AS l
+                JOIN account_account ON (l.account_id = account_account.id)
+                JOIN account_move am ON (l.move_id = am.id)
+                ''' + matched_join + '''
+                WHERE (am.state IN %s)
+                    AND (account_account.account_type IN %s)
+                    AND ''' + reconciliation_clause + '''
+                    AND ((l.partner_id IN %s) OR (l.partner_id IS NULL))
+                    AND (l.date <= %s)
+                    AND l.company_id IN %s
+                ORDER BY l.id'''
+        params = (period_args + tuple(matched_args) + (tuple(move_state), tuple(account_type))
+                  + tuple(reconciled_after_args) + (tuple(partner_ids), date_from, tuple(company_ids)))
+        return query, params
+
+    def _get_partner_move_lines(self, account_type, partner_ids,
+                                date_from, target_move, period_length):
+        # This method can receive the context key 'include_nullified_amount' {Boolean}
+        # Do an invoice and a payment and unreconcile. The amount will be nullified
+        # By default, the partner wouldn't appear in this report.
+        # The context key allow it to appear
+        date_from = datetime.strptime(str(date_from), "%Y-%m-%d").date()
+        periods = self._get_periods(date_from, period_length)
 
         res = []
         total = []
@@ -53,14 +97,11 @@ class ReportAgedPartnerBalance(models.AbstractModel):
             move_state = ['posted']
         arg_list = (tuple(move_state), tuple(account_type))
 
-        reconciliation_clause = '(l.reconciled IS FALSE)'
-        cr.execute('SELECT debit_move_id, credit_move_id FROM account_partial_reconcile where max_date > %s', (date_from,))
-        reconciled_after_date = []
-        for row in cr.fetchall():
-            reconciled_after_date += [row[0], row[1]]
-        if reconciled_after_date:
-            reconciliation_clause = '(l.reconciled IS FALSE OR l.id IN %s)'
-            arg_list += (tuple(reconciled_after_date),)
+        # the lines open on date_from: not reconciled, or reconciled later
+        MoveLine = self.env['account.move.line']
+        reconciled_after_clause, reconciled_after_args = MoveLine._get_reconciled_after_clause(date_from)
+        reconciliation_clause = '(l.reconciled IS FALSE OR ' + reconciled_after_clause + ')'
+        arg_list += tuple(reconciled_after_args)
         arg_list += (date_from, tuple(company_ids))
         query = '''
             SELECT DISTINCT l.partner_id, UPPER(res_partner.name)
@@ -86,108 +127,45 @@ class ReportAgedPartnerBalance(models.AbstractModel):
         if not partner_ids:
             return [], [], {}
 
-        # This dictionary will store the not due amount of all partners
+        # Age every open line in a single pass: the CASE expression gives the
+        # period of the line (6 for not due, 1 to 5 for the periods) and the
+        # partials reconciled up to date_from are summed per line.
+        query, params = self._get_aged_lines_query(account_type, partner_ids, date_from, move_state, company_ids, periods)
+        cr.execute(query, params)
+        rows = cr.dictfetchall()
+
+        # The amounts are all converted at the same date, so one rate per
+        # company is enough.
+        rate_cache = self.env['res.currency']._get_report_rate_cache()
+        rates = {}
+        for company_id in {row['company_id'] for row in rows}:
+            company_currency = self.env['res.company'].browse(company_id).currency_id
+            rates[company_id] = rate_cache.get_rate(company_currency, user_currency, company, date)
+
+        # history[i] = {'<partner_id>': <partner_debit-credit>} for the
+        # period i + 1, undue_amounts holds the not due amounts
+        history = [{} for i in range(5)]
         undue_amounts = {}
-        query = '''SELECT l.id
-                FROM account_move_line AS l, account_account, account_move am
-                WHERE (l.account_id = account_account.id) AND (l.move_id = am.id)
-                    AND (am.state IN %s)
-                    AND (account_account.account_type IN %s)
-                    AND (COALESCE(l.date_maturity,l.date) >= %s)\
-                    AND ((l.partner_id IN %s) OR (l.partner_id IS NULL))
-                AND (l.date <= %s)
-                AND l.company_id IN %s'''
-        cr.execute(query, (tuple(move_state), tuple(account_type), date_from,
-                           tuple(partner_ids), date_from, tuple(company_ids)))
-        aml_ids = cr.fetchall()
-        aml_ids = aml_ids and [x[0] for x in aml_ids] or []
-        for line in self.env['account.move.line'].browse(aml_ids):
-            partner_id = line.partner_id.id or False
-            if partner_id not in undue_amounts:
-                undue_amounts[partner_id] = 0.0
-            line_amount = line.company_id.currency_id._convert(line.balance,
-                                                               user_currency,
-                                                               company, date)
+        move_lines = self.env['account.move.line'].browse([row['id'] for row in rows])
+        for line, row in zip(move_lines, rows):
+            partner_id = row['partner_id'] or False
+            partners_amount = undue_amounts if row['period'] == 6 else history[row['period'] - 1]
+            if partner_id not in partners_amount:
+                partners_amount[partner_id] = 0.0
+            rate = rates[row['company_id']]
+            line_amount = user_currency.round(row['balance'] * rate)
             if user_currency.is_zero(line_amount):
                 continue
-            for partial_line in line.matched_debit_ids:
-                if partial_line.max_date <= date_from:
-                    line_currency = partial_line.company_id.currency_id
-                    line_amount += line_currency._convert(partial_line.amount,
-                                                          user_currency,
-                                                          company, date)
-            for partial_line in line.matched_credit_ids:
-                if partial_line.max_date <= date_from:
-                    line_currency = partial_line.company_id.currency_id
-                    line_amount -= line_currency._convert(partial_line.amount,
-                                                          user_currency,
-                                                          company, date)
-            if not self.env.user.company_id.currency_id.is_zero(line_amount):
-                undue_amounts[partner_id] += line_amount
-                lines[partner_id].append({
+            line_amount += user_currency.round(row['matched_debit_amount'] * rate)
+            line_amount -= user_currency.round(row['matched_credit_amount'] * rate)
+            if not user_currency.is_zero(line_amount):
+                partners_amount[partner_id] += line_amount
+                lines.setdefault(partner_id, []).append({
                     'line': line,
                     'amount': line_amount,
-                    'period': 6,
+                    'period': row['period'],
                 })
 
-        # Use one query per period and store results in history (a list variable)
-        # Each history will contain: history[1] = {'<partner_id>': <partner_debit-credit>}
-        history = []
-        for i in range(5):
-            args_list = (tuple(move_state), tuple(account_type), tuple(partner_ids),)
-            dates_query = '(COALESCE(l.date_maturity,l.date)'
-
-            if periods[str(i)]['start'] and periods[str(i)]['stop']:
-                dates_query += ' BETWEEN %s AND %s)'
-                args_list += (periods[str(i)]['start'], periods[str(i)]['stop'])
-            elif periods[str(i)]['start']:
-                dates_query += ' >= %s)'
-                args_list += (periods[str(i)]['start'],)
-            else:
-                dates_query += ' <= %s)'
-                args_list += (periods[str(i)]['stop'],)
-            args_list += (date_from, tuple(company_ids))
-
-            query = '''SELECT l.id
-                    FROM account_move_line AS l, account_account, account_move am
-                    WHERE (l.account_id = account_account.id) AND (l.move_id = am.id)
-                        AND (am.state IN %s)
-                        AND (account_account.account_type IN %s)
-                        AND ((l.partner_id IN %s) OR (l.partner_id IS NULL))
-                        AND ''' + dates_query + '''
-                    AND (l.date <= %s)
-                    AND l.company_id IN %s'''
-            cr.execute(query, args_list)
-            partners_amount = {}
-            aml_ids = cr.fetchall()
-            aml_ids = aml_ids and [x[0] for x in aml_ids] or []
-            for line in self.env['account.move.line'].browse(aml_ids):
-                partner_id = line.partner_id.id or False
-                if partner_id not in partners_amount:
-                    partners_amount[partner_id] = 0.0
-                line_currency_id = line.company_id.currency_id
-                line_amount = line_currency_id._convert(line.balance, user_currency, company, date)
-                if user_currency.is_zero(line_amount):
-                    continue
-                for partial_line in line.matched_debit_ids:
-                    if partial_line.max_date <= date_from:
-                        line_currency_id = partial_line.company_id.currency_id
-                        line_amount += line_currency_id._convert(
-                            partial_line.amount, user_currency, company, date)
-                for partial_line in line.matched_credit_ids:
-                    if partial_line.max_date <= date_from:
-                        line_currency_id = partial_line.company_id.currency_id
-                        line_amount -= line_currency_id._convert(
-                            partial_line.amount, user_currency, company, date)
-                if not self.env.user.company_id.currency_id.is_zero(line_amount):
-                    partners_amount[partner_id] += line_amount
-                    lines[partner_id].append({
-                        'line': line,
-                        'amount': line_amount,
-                        'period': i + 1,
-                        })
-            history.append(partners_amount)
-
         for partner in partners:
             if partner['partner_id'] is None:
                 partner['partner_id'] = False
@@ -261,3 +239,13 @@ class ReportAgedPartnerBalance(models.AbstractModel):
             'get_partner_lines': movelines,
             'get_direction': total,
         }
+
+    def _get_xlsx_rows(self, data, values):
+        """ Rows of the spreadsheet export, see ``account.report.xlsx``. """
+        form = values['data']
+        yield 'header', [_('Partners'), _('Not due')] + [form[str(i)]['name'] for i in range(4, -1, -1)] + [_('Total')]
+        total = values['get_direction']
+        if values['get_partner_lines']:
+            yield 'section', [_('Account Total'), total[6], total[4], total[3], total[2], total[1], total[0], total[5]]
+        for partner in values['get_partner_lines']:
+            yield 'line', [partner['name'], partner['direction']] + [partner[str(i)] for i in range(4, -1, -1)] + [partner['total']]
@@ -1,4 +1,6 @@
 import time
+from collections import defaultdict
+
 from odoo import api, models, _
 from odoo.exceptions import UserError
 
@@ -19,7 +21,15 @@ class ReportFinancial(models.AbstractModel):
         res = {}
         for account in accounts:
             res[account.id] = dict.fromkeys(mapping, 0.0)
-        if accounts:
+        if self.env.context.get('consolidate'):
+            res.update(self.env['account.report.consolidation']._get_balances(accounts.ids))
+            return res
+        snapshot = self.env['account.balance.snapshot']._get_balances(accounts.ids)
+        if snapshot is not None:
+            # posted entries, read from the monthly balance snapshot
+            for account_id, row in snapshot.items():
+                res[account_id] = dict(row, id=account_id)
+        elif accounts:
             tables, where_clause, where_params = self.env['account.move.line']._query_get()
             tables = tables.replace('"', '') if tables else "account_move_line"
             wheres = [""]
@@ -37,46 +47,130 @@ class ReportFinancial(models.AbstractModel):
                 res[row['id']] = row
         return res
 
-    def _compute_report_balance(self, reports):
+    def _get_report_nodes(self, reports):
+        """ Return ``reports`` together with every report they depend on,
+            through their children or the report they take their value from,
+            loaded with one query. """
+        self.env.cr.execute("""
+            WITH RECURSIVE tree(id) AS (
+                SELECT id FROM account_financial_report WHERE id IN %s
+                UNION
+                SELECT r.id
+                FROM account_financial_report r, account_financial_report p, tree
+                WHERE p.id = tree.id
+                    AND (r.parent_id = p.id OR (p.type = 'account_report' AND r.id = p.account_report_id))
+            )
+            SELECT id FROM tree""", (tuple(reports.ids),))
+        return self.env['account.financial.report'].browse([report_id for (report_id,) in self.env.cr.fetchall()])
+
+    def _get_report_accounts(self, reports):
+        """ Return ``{report_id: accounts}`` for the 'accounts' and
+            'account_type' reports among ``reports`` and their dependencies.
+        """
+        nodes = self._get_report_nodes(reports)
+        # accounts of the 'account_type' nodes, grouped by type
+        account_types = nodes.filtered(lambda r: r.type == 'account_type').account_type_ids.mapped('type')
+        accounts_by_type = defaultdict(lambda: self.env['account.account'])
+        if account_types:
+            for account in self.env['account.account'].search([('account_type', 'in', account_types)]):
+                accounts_by_type[account.account_type] |= account
+        node_accounts = {}
+        for node in nodes:
+            if node.type == 'accounts':
+                node_accounts[node.id] = node.account_ids
+            elif node.type == 'account_type':
+                node_accounts[node.id] = self.env['account.account'].union(
+                    *(accounts_by_type[account_type] for account_type in node.account_type_ids.mapped('type')))
+        if self.env.context.get('consolidate'):
+            # the accounts of the other companies are consolidated per code
+            Consolidation = self.env['account.report.consolidation']
+            node_accounts = {
+                node_id: Consolidation._get_displayed_accounts(accounts)
+                for node_id, accounts in node_accounts.items()
+            }
+        return node_accounts
+
+    def _compute_report_balance(self, reports, node_accounts=None, account_balances=None):
         '''returns a dictionary with key=the ID of a record and value=the credit, debit and balance amount
-           computed for this record. If the record is of type :
-               'accounts' : it's the sum of the linked accounts
-               'account_type' : it's the sum of leaf accoutns with such an account_type
-               'account_report' : it's the amount of the related report
-               'sum' : it's the sum of the children of this record (aka a 'view' record)'''
-        res = {}
+           computed for this record. If the record is of type :
+               'accounts' : it's the sum of the linked accounts
+               'account_type' : it's the sum of leaf accoutns with such an account_type
+               'account_report' : it's the amount of the related report
+               'sum' : it's the sum of the children of this record (aka a 'view' record)
+
+           The balances of all the accounts used by the reports and their
+           dependencies are computed with a single grouped query, then
+           rolled up the report tree in memory. ``node_accounts`` (see
+           ``_get_report_accounts``) and ``account_balances`` may be given
+           to reuse precomputed values.'''
         fields = ['credit', 'debit', 'balance']
-        for report in reports:
+        if not reports:
+            return {}
+        if node_accounts is None:
+            node_accounts = self._get_report_accounts(reports)
+        if account_balances is None:
+            all_accounts = self.env['account.account'].union(*node_accounts.values())
+            account_balances = self._compute_account_balance(all_accounts)
+        zero = dict.fromkeys(fields, 0.0)
+
+        res = {}
+
+        def _compute(report):
             if report.id in res:
-                continue
+                return res[report.id]
             res[report.id] = dict((fn, 0.0) for fn in fields)
-            if report.type == 'accounts':
-                # it's the sum of the linked accounts
-                res[report.id]['account'] = self._compute_account_balance(report.account_ids)
-                for value in res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
-            elif report.type == 'account_type':
-                # it's the sum the leaf accounts with such an account type
-                accounts = self.env['account.account'].search(
-                    [('account_type', 'in', report.account_type_ids.mapped('type'))])
-
-                res[report.id]['account'] = self._compute_account_balance(accounts)
+            if report.id in node_accounts:
+                res[report.id]['account'] = {
+                    account.id: dict(account_balances.get(account.id, zero))
+                    for account in node_accounts[report.id]
+                }
                 for value in res[report.id]['account'].values():
                     for field in fields:
                         res[report.id][field] += value.get(field)
             elif report.type == 'account_report' and report.account_report_id:
-                # it's the amount of the linked report
-                res2 = self._compute_report_balance(report.account_report_id)
-                for key, value in res2.items():
-                    for field in fields:
-                        res[report.id][field] += value[field]
+                value = _compute(report.account_report_id)
+                for field in fields:
+                    res[report.id][field] += value[field]
             elif report.type == 'sum':
-                # it's the sum of the children of this account.report
-                res2 = self._compute_report_balance(report.children_ids)
-                for key, value in res2.items():
+                for child in report.children_ids:
+                    value = _compute(child)
                     for field in fields:
                         res[report.id][field] += value[field]
+            return res[report.id]
+
+        for report in reports:
+            _compute(report)
+        return {report.id: res[report.id] for report in reports}
+
+    def _compute_period_report_balance(self, reports, date_from, date_to, period_split):
+        """ Same as ``_compute_report_balance`` for the whole range, with the
+            balances of each month or quarter (``period_split``) added under
+            the key ``period_bal`` of the reports and of their accounts. All
+            the periods come from a single scan of the move lines.
+        """
+        MoveLine = self.env['account.move.line']
+        node_accounts = self._get_report_accounts(reports)
+        all_accounts = self.env['account.account'].union(*node_accounts.values())
+        periods = MoveLine._get_report_periods(date_from, date_to, period_split)
+        period_balances = MoveLine._get_period_balances(all_accounts.ids, period_split)
+
+        totals = {}
+        for account_balances in period_balances.values():
+            for account_id, value in account_balances.items():
+                total = totals.setdefault(account_id, dict.fromkeys(('debit', 'credit', 'balance'), 0.0))
+                for field in total:
+                    total[field] += value[field]
+        res = self._compute_report_balance(reports, node_accounts, totals)
+        period_res = [
+            self._compute_report_balance(reports, node_accounts, period_balances.get(start, {}))
+            for start, label in periods
+        ]
+        for report_id, value in res.items():
+            value['period_bal'] = [period[report_id]['balance'] for period in period_res]
+            for account_id, account_value in value.get('account', {}).items():
+                account_value['period_bal'] = [
+                    period[report_id]['account'][account_id]['balance'] for period in period_res
+                ]
         return res
 
     def get_account_lines(self, data):
@@ -84,7 +178,11 @@ class ReportFinancial(models.AbstractModel):
         account_report = self.env['account.financial.report'].search(
             [('id', '=', data['account_report_id'][0])])
         child_reports = account_report._get_children_by_order()
-        res = self.with_context(data.get('used_context'))._compute_report_balance(child_reports)
+        if data.get('period_split'):
+            res = self.with_context(data.get('used_context'))._compute_period_report_balance(
+                child_reports, data['date_from'], data['date_to'], data['period_split'])
+        else:
+            res = self.with_context(data.get('used_context'))._compute_report_balance(child_reports)
         if data['enable_filter']:
             comparison_res = self.with_context(
                 data.get('comparison_context'))._compute_report_balance(
@@ -95,6 +193,10 @@ class ReportFinancial(models.AbstractModel):
                 if report_acc:
                     for account_id, val in comparison_res[report_id].get('account').items():
                         report_acc[account_id]['comp_bal'] = val['balance']
+        # prefetch the accounts displayed in details all at once
+        account_ids = list({
+            account_id for value in res.values() for account_id in value.get('account', ())
+        })
         for report in child_reports:
             vals = {
                 'name': report.name,
@@ -109,6 +211,8 @@ class ReportFinancial(models.AbstractModel):
 
             if data['enable_filter']:
                 vals['balance_cmp'] = res[report.id]['comp_bal'] * float(report.sign)
+            if data.get('period_split'):
+                vals['balance_periods'] = [balance * float(report.sign) for balance in res[report.id]['period_bal']]
 
             lines.append(vals)
             if report.display_detail == 'no_detail':
@@ -121,7 +225,7 @@ class ReportFinancial(models.AbstractModel):
                     #the COA + 1 (to avoid having them with a too low level that would conflicts with the level of data
                     #financial reports for Assets, liabilities...)
                     flag = False
-                    account = self.env['account.account'].browse(account_id)
+                    account = self.env['account.account'].browse(account_id).with_prefetch(account_ids)
                     vals = {
                         'name': account.code + ' ' + account.name,
                         'balance': value['balance'] * float(report.sign) or 0.0,
@@ -140,6 +244,10 @@ class ReportFinancial(models.AbstractModel):
                         vals['balance_cmp'] = value['comp_bal'] * float(report.sign)
                         if not self.env.company.currency_id.is_zero(vals['balance_cmp']):
                             flag = True
+                    if data.get('period_split'):
+                        vals['balance_periods'] = [balance * float(report.sign) for balance in value['period_bal']]
+                        if any(not self.env.company.currency_id.is_zero(balance) for balance in vals['balance_periods']):
+                            flag = True
                     if flag:
                         sub_lines.append(vals)
                 lines += sorted(sub_lines, key=lambda sub_line: sub_line['name'])
@@ -153,6 +261,10 @@ class ReportFinancial(models.AbstractModel):
         model = self.env.context.get('active_model')
         docs = self.env[model].browse(self.env.context.get('active_id'))
         report_lines = self.get_account_lines(data.get('form'))
+        periods = []
+        if data['form'].get('period_split'):
+            periods = self.env['account.move.line']._get_report_periods(
+                data['form']['date_from'], data['form']['date_to'], data['form']['period_split'])
         return {
             'doc_ids': self.ids,
             'doc_model': model,
@@ -160,4 +272,33 @@ class ReportFinancial(models.AbstractModel):
             'docs': docs,
             'time': time,
             'get_account_lines': report_lines,
+            'period_labels': [label for start, label in periods],
         }
+
+    def _get_xlsx_rows(self, data, values):
+        """ Rows of the spreadsheet export, see ``account.report.xlsx``. """
+        form = values['data']
+        with_periods = bool(form.get('period_split'))
+        with_debit_credit = not with_periods and form['debit_credit'] == 1
+        with_comparison = not with_periods and not form['debit_credit'] and form['enable_filter'] == 1
+        header = [_('Name')]
+        if with_periods:
+            header += values['period_labels']
+        if with_debit_credit:
+            header += [_('Debit'), _('Credit')]
+        header.append(_('Balance'))
+        if with_comparison:
+            header.append(form['label_filter'])
+        yield 'header', header
+        for line in values['get_account_lines']:
+            if line['level'] == 0:
+                continue
+            row = ['  ' * (int(line['level']) - 1) + line['name']]
+            if with_periods:
+                row += list(line.get('balance_periods', []))
+            if with_debit_credit:
+                row += [line.get('debit'), line.get('credit')]
+            row.append(line.get('balance'))
+            if with_comparison:
+                row.append(line.get('balance_cmp'))
+            yield 'section' if int(line['level']) <= 3 else 'line', row
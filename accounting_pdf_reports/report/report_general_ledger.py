@@ -1,4 +1,5 @@
 import time
+
 from odoo import api, models, _
 from odoo.exceptions import UserError
 
@@ -28,112 +29,18 @@ class ReportGeneralLedger(models.AbstractModel):
                 'move_lines': list of move line
         }
         """
-        cr = self.env.cr
-        MoveLine = self.env['account.move.line']
-        move_lines = {x: [] for x in accounts.ids}
-
-        # Prepare initial sql query and Get the initial move lines
-        if init_balance:
-            context = dict(self.env.context)
-            context['date_from'] = self.env.context.get('date_from')
-            context['date_to'] = False
-            context['initial_bal'] = True
-            if analytic_account_ids:
-                context['analytic_account_ids'] = analytic_account_ids
-            if partner_ids:
-                context['partner_ids'] = partner_ids
-            init_tables, init_where_clause, init_where_params = MoveLine.with_context(context)._query_get()
-            init_wheres = [""]
-            if init_where_clause.strip():
-                init_wheres.append(init_where_clause.strip())
-            init_filters = " AND ".join(init_wheres)
-            filters = init_filters.replace('account_move_line__move_id', 'm').replace('account_move_line', 'l')
-            sql = ("""SELECT 0 AS lid, l.account_id AS account_id, '' AS ldate,
-                '' AS lcode, 0.0 AS amount_currency, 
-                '' AS analytic_account_id, '' AS lref, 
-                'Initial Balance' AS lname, COALESCE(SUM(l.debit),0.0) AS debit, 
-                COALESCE(SUM(l.credit),0.0) AS credit, 
-                COALESCE(SUM(l.debit),0) - COALESCE(SUM(l.credit), 0) as balance, 
-                '' AS lpartner_id,\
-                '' AS move_name, '' AS move_id, '' AS currency_code,\
-                NULL AS currency_id,\
-                '' AS invoice_id, '' AS invoice_type, '' AS invoice_number,\
-                '' AS partner_name\
-                FROM account_move_line l\
-                LEFT JOIN account_move m ON (l.move_id=m.id)\
-                LEFT JOIN res_currency c ON (l.currency_id=c.id)\
-                LEFT JOIN res_partner p ON (l.partner_id=p.id)\
-                JOIN account_journal j ON (l.journal_id=j.id)\
-                WHERE l.account_id IN %s""" + filters + ' GROUP BY l.account_id')
-            params = (tuple(accounts.ids),) + tuple(init_where_params)
-            cr.execute(sql, params)
-            for row in cr.dictfetchall():
-                move_lines[row.pop('account_id')].append(row)
-
-        sql_sort = 'l.date, l.move_id'
-        if sortby == 'sort_journal_partner':
-            sql_sort = 'j.code, p.name, l.move_id'
-
-        # Prepare sql query base on selected parameters from wizard
-        context = dict(self.env.context)
-        if analytic_account_ids:
-            context['analytic_account_ids'] = analytic_account_ids
-        if partner_ids:
-            context['partner_ids'] = partner_ids
-        tables, where_clause, where_params = MoveLine.with_context(context)._query_get()
-        wheres = [""]
-        if where_clause.strip():
-            wheres.append(where_clause.strip())
-        filters = " AND ".join(wheres)
-        filters = filters.replace('account_move_line__move_id', 'm').replace('account_move_line', 'l')
+        return self.env['account.report.ledger']._get_ledger(
+            accounts, init_balance, sortby, display_account,
+            analytic_account_ids=analytic_account_ids, partner_ids=partner_ids)
 
-        # Get move lines base on sql query and Calculate the total balance of move lines
-        sql = ('''SELECT l.id AS lid, l.account_id AS account_id, 
-            l.date AS ldate, j.code AS lcode, l.currency_id, 
-            l.amount_currency, '' AS analytic_account_id,
-            l.ref AS lref, l.name AS lname, COALESCE(l.debit,0) AS debit, 
-            COALESCE(l.credit,0) AS credit, 
-            COALESCE(SUM(l.debit),0) - COALESCE(SUM(l.credit), 0) AS balance,\
-            m.name AS move_name, c.symbol AS currency_code, 
-            p.name AS partner_name\
-            FROM account_move_line l\
-            JOIN account_move m ON (l.move_id=m.id)\
-            LEFT JOIN res_currency c ON (l.currency_id=c.id)\
-            LEFT JOIN res_partner p ON (l.partner_id=p.id)\
-            JOIN account_journal j ON (l.journal_id=j.id)\
-            JOIN account_account acc ON (l.account_id = acc.id) \
-            WHERE l.account_id IN %s ''' + filters + ''' GROUP BY l.id, 
-            l.account_id, l.date, j.code, l.currency_id, l.amount_currency, 
-            l.ref, l.name, m.name, c.symbol, p.name ORDER BY ''' + sql_sort)
-        params = (tuple(accounts.ids),) + tuple(where_params)
-        cr.execute(sql, params)
-
-        for row in cr.dictfetchall():
-            balance = 0
-            for line in move_lines.get(row['account_id']):
-                balance += line['debit'] - line['credit']
-            row['balance'] += balance
-            move_lines[row.pop('account_id')].append(row)
-
-        # Calculate the debit, credit and balance for Accounts
-        account_res = []
-        for account in accounts:
-            currency = account.currency_id and account.currency_id or self.env.company.currency_id
-            res = dict((fn, 0.0) for fn in ['credit', 'debit', 'balance'])
-            res['code'] = account.code
-            res['name'] = account.name
-            res['move_lines'] = move_lines[account.id]
-            for line in res.get('move_lines'):
-                res['debit'] += line['debit']
-                res['credit'] += line['credit']
-                res['balance'] = line['balance']
-            if display_account == 'all':
-                account_res.append(res)
-            if display_account == 'movement' and res.get('move_lines'):
-                account_res.append(res)
-            if display_account == 'not_zero' and not currency.is_zero(res['balance']):
-                account_res.append(res)
-        return account_res
+    def _iter_account_move_entry(self, accounts, analytic_account_ids,
+                                 partner_ids, init_balance,
+                                 sortby, display_account):
+        """ Streaming counterpart of ``_get_account_move_entry``, see
+            ``account.report.ledger._iter_ledger``. """
+        return self.env['account.report.ledger']._iter_ledger(
+            accounts, init_balance, sortby, display_account,
+            analytic_account_ids=analytic_account_ids, partner_ids=partner_ids)
 
     @api.model
     def _get_report_values(self, docids, data=None):
@@ -164,8 +71,13 @@ class ReportGeneralLedger(models.AbstractModel):
             if data['form'].get('account_ids', False):
                 domain.append(('id', 'in', data['form']['account_ids']))
             accounts = self.env['account.account'].search(domain)
-        accounts_res = self.with_context(
-            data['form'].get('used_context', {}))._get_account_move_entry(
+        report = self.with_context(data['form'].get('used_context', {}))
+        get_entries = report._get_account_move_entry
+        # only set by the spreadsheet export, which writes the rows as they
+        # come: the PDF is rendered from the whole QWeb output anyway
+        if data['form'].get('streaming'):
+            get_entries = report._iter_account_move_entry
+        accounts_res = get_entries(
             accounts,
             analytic_account_ids,
             partner_ids,
@@ -182,3 +94,17 @@ class ReportGeneralLedger(models.AbstractModel):
             'partner_ids': partner_ids,
             'analytic_account_ids': analytic_account_ids,
         }
+
+    def _get_xlsx_rows(self, data, values):
+        """ Rows of the spreadsheet export, see ``account.report.xlsx``. """
+        yield 'header', [_('Date'), _('JRNL'), _('Partner'), _('Ref'), _('Move'), _('Entry Label'),
+                         _('Debit'), _('Credit'), _('Balance'), _('Amount Currency'), _('Currency')]
+        for account in values['Accounts']:
+            yield 'section', ['%s %s' % (account['code'], account['name']), '', '', '', '', '',
+                              account['debit'], account['credit'], account['balance']]
+            for line in account['move_lines']:
+                has_currency = line['amount_currency'] and line['amount_currency'] > 0.00
+                yield 'line', [line['ldate'], line['lcode'], line['partner_name'], line['lref'],
+                               line['move_name'], line['lname'], line['debit'], line['credit'],
+                               line['balance'], line['amount_currency'] if has_currency else '',
+                               line['currency_code'] if has_currency else '']
@@ -90,6 +90,76 @@ class ReportJournal(models.AbstractModel):
                 res[tax]['tax_amount'] = res[tax]['tax_amount'] * -1
         return res
 
+    def _get_journals_data(self, data, journals):
+        """ Compute the lines, the debit/credit totals and the taxes of all
+            the given journals with one query each, grouped by journal.
+
+            :returns: a dictionary ``{journal_id: {'lines': move lines,
+                'debit': ..., 'credit': ..., 'taxes': {tax: {'base_amount':
+                ..., 'tax_amount': ...}}}}``
+        """
+        move_state = ['draft', 'posted']
+        if data['form'].get('target_move', 'all') == 'posted':
+            move_state = ['posted']
+        sort_selection = data['form'].get('sort_selection', 'date')
+        query_get_clause = self._get_query_get_clause(data)
+        params = [tuple(move_state), tuple(journals.ids)] + query_get_clause[2]
+        res = {
+            journal.id: {'lines': [], 'debit': 0.0, 'credit': 0.0, 'taxes': {}}
+            for journal in journals
+        }
+        if not journals:
+            return res
+
+        query = 'SELECT "account_move_line".journal_id, "account_move_line".id FROM ' + query_get_clause[0] + ', account_move am, account_account acc WHERE "account_move_line".account_id = acc.id AND "account_move_line".move_id=am.id AND am.state IN %s AND "account_move_line".journal_id IN %s AND ' + query_get_clause[1] + ' ORDER BY "account_move_line".journal_id, '
+        if sort_selection == 'date':
+            query += '"account_move_line".date'
+        else:
+            query += 'am.name'
+        query += ', "account_move_line".move_id'
+        self.env.cr.execute(query, tuple(params))
+        rows = self.env.cr.fetchall()
+        for journal_id, line_id in rows:
+            res[journal_id]['lines'].append(line_id)
+        # share one prefetch set so the lines of all journals load together
+        prefetch_ids = [line_id for journal_id, line_id in rows]
+        for journal_data in res.values():
+            journal_data['lines'] = self.env['account.move.line'].browse(journal_data['lines']).with_prefetch(prefetch_ids)
+
+        self.env.cr.execute('SELECT "account_move_line".journal_id, SUM(debit), SUM(credit) FROM ' + query_get_clause[0] + ', account_move am '
+                            'WHERE "account_move_line".move_id=am.id AND am.state IN %s AND "account_move_line".journal_id IN %s AND ' + query_get_clause[1] + ' '
+                            'GROUP BY "account_move_line".journal_id',
+                            tuple(params))
+        for journal_id, debit, credit in self.env.cr.fetchall():
+            res[journal_id]['debit'] = debit or 0.0
+            res[journal_id]['credit'] = credit or 0.0
+
+        query = """
+            SELECT "account_move_line".journal_id, rel.account_tax_id, SUM("account_move_line".balance) AS base_amount
+            FROM account_move_line_account_tax_rel rel, """ + query_get_clause[0] + """
+            LEFT JOIN account_move am ON "account_move_line".move_id = am.id
+            WHERE "account_move_line".id = rel.account_move_line_id
+                AND am.state IN %s
+                AND "account_move_line".journal_id IN %s
+                AND """ + query_get_clause[1] + """
+           GROUP BY "account_move_line".journal_id, rel.account_tax_id"""
+        self.env.cr.execute(query, tuple(params))
+        base_amounts = self.env.cr.fetchall()
+        self.env.cr.execute('SELECT "account_move_line".journal_id, tax_line_id, sum(debit - credit) FROM ' + query_get_clause[0] + ', account_move am '
+                            'WHERE "account_move_line".move_id=am.id AND am.state IN %s AND "account_move_line".journal_id IN %s AND ' + query_get_clause[1] + ' AND tax_line_id IS NOT NULL '
+                            'GROUP BY "account_move_line".journal_id, tax_line_id',
+                            tuple(params))
+        tax_amounts = {(journal_id, tax_id): amount for journal_id, tax_id, amount in self.env.cr.fetchall()}
+        taxes = self.env['account.tax'].browse([tax_id for journal_id, tax_id, base_amount in base_amounts])
+        for (journal_id, tax_id, base_amount), tax in zip(base_amounts, taxes):
+            # sales operation are credits
+            sign = -1 if journals.browse(journal_id).type == 'sale' else 1
+            res[journal_id]['taxes'][tax] = {
+                'base_amount': base_amount * sign,
+                'tax_amount': (tax_amounts.get((journal_id, tax_id)) or 0.0) * sign,
+            }
+        return res
+
     def _get_query_get_clause(self, data):
         return self.env['account.move.line'].with_context(data['form'].get('used_context', {}))._query_get()
 
@@ -101,17 +171,50 @@ class ReportJournal(models.AbstractModel):
         target_move = data['form'].get('target_move', 'all')
         sort_selection = data['form'].get('sort_selection', 'date')
 
-        res = {}
-        for journal in data['form']['journal_ids']:
-            res[journal] = self.with_context(data['form'].get('used_context', {})).lines(target_move, journal, sort_selection, data)
+        journals = self.env['account.journal'].browse(data['form']['journal_ids'])
+        journals_data = self.with_context(data['form'].get('used_context', {}))._get_journals_data(data, journals)
+        res = {journal_id: journal_data['lines'] for journal_id, journal_data in journals_data.items()}
+
+        def sum_debit(data, journal_id):
+            return journals_data[journal_id.id]['debit']
+
+        def sum_credit(data, journal_id):
+            return journals_data[journal_id.id]['credit']
+
+        def get_taxes(data, journal_id):
+            return journals_data[journal_id.id]['taxes']
+
         return {
             'doc_ids': data['form']['journal_ids'],
             'doc_model': self.env['account.journal'],
             'data': data,
-            'docs': self.env['account.journal'].browse(data['form']['journal_ids']),
+            'docs': journals,
             'time': time,
             'lines': res,
-            'sum_credit': self._sum_credit,
-            'sum_debit': self._sum_debit,
-            'get_taxes': self._get_taxes,
+            'sum_credit': sum_credit,
+            'sum_debit': sum_debit,
+            'get_taxes': get_taxes,
         }
+
+    def _get_xlsx_rows(self, data, values):
+        """ Rows of the spreadsheet export, see ``account.report.xlsx``. """
+        amount_currency = data['form'].get('amount_currency')
+        header = [_('Move'), _('Date'), _('Account'), _('Partner'), _('Label'), _('Debit'), _('Credit')]
+        if amount_currency:
+            header += [_('Amount Currency'), _('Currency')]
+        for journal in values['docs']:
+            yield 'section', [journal.name]
+            yield 'header', header
+            for aml in values['lines'][journal.id]:
+                row = [aml.move_id.name != '/' and aml.move_id.name or ('*' + str(aml.move_id.id)),
+                       str(aml.date), aml.account_id.code, aml.sudo().partner_id.name or '',
+                       aml.name or '', aml.debit, aml.credit]
+                if amount_currency and aml.amount_currency:
+                    row += [aml.amount_currency, aml.currency_id.name]
+                yield 'line', row
+            yield 'section', [_('Total'), '', '', '', '', values['sum_debit'](data, journal), values['sum_credit'](data, journal)]
+            yield 'header', [_('Tax Declaration'), _('Base Amount'), _('Tax Amount')]
+            taxes = values['get_taxes'](data, journal)
+            for tax in taxes:
+                yield 'line', [tax.name, taxes[tax]['base_amount'], taxes[tax]['tax_amount']]
+            yield 'line', []
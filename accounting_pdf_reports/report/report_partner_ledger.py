@@ -1,18 +1,35 @@
 import time
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+# Number of partners fetched per query by _get_partner_ledger_data.
+PARTNER_CHUNK_SIZE = 1000
 
 
 class ReportPartnerLedger(models.AbstractModel):
     _name = 'report.accounting_pdf_reports.report_partnerledger'
     _description = 'Partner Ledger Report'
 
+    def _get_reconcile_clause(self, data):
+        """ Return the condition (and its params) excluding the reconciled
+            lines unless they are requested. With an end date, the lines
+            reconciled after it are still displayed, as they were open then.
+        """
+        if data['form']['reconciled']:
+            return "", []
+        date_to = data['form'].get('used_context', {}).get('date_to')
+        if not date_to:
+            return ' AND "account_move_line".full_reconcile_id IS NULL ', []
+        clause, params = self.env['account.move.line']._get_reconciled_after_clause(date_to, alias='"account_move_line"')
+        return ' AND ("account_move_line".full_reconcile_id IS NULL OR ' + clause + ') ', params
+
     def _lines(self, data, partner):
         full_account = []
         currency = self.env['res.currency']
         query_get_data = self.env['account.move.line'].with_context(data['form'].get('used_context', {}))._query_get()
-        reconcile_clause = "" if data['form']['reconciled'] else ' AND "account_move_line".full_reconcile_id IS NULL '
-        params = [partner.id, tuple(data['computed']['move_state']), tuple(data['computed']['account_ids'])] + query_get_data[2]
+        reconcile_clause, reconcile_params = self._get_reconcile_clause(data)
+        params = [partner.id, tuple(data['computed']['move_state']), tuple(data['computed']['account_ids'])] + query_get_data[2] + reconcile_params
         query = """
             SELECT "account_move_line".id, "account_move_line".date, j.code, acc.name->>'en_US' as a_name, "account_move_line".ref, m.name as move_name, "account_move_line".name, "account_move_line".debit, "account_move_line".credit, "account_move_line".amount_currency,"account_move_line".currency_id, c.symbol AS currency_code
             FROM """ + query_get_data[0] + """
@@ -48,9 +65,9 @@ class ReportPartnerLedger(models.AbstractModel):
             return
         result = 0.0
         query_get_data = self.env['account.move.line'].with_context(data['form'].get('used_context', {}))._query_get()
-        reconcile_clause = "" if data['form']['reconciled'] else ' AND "account_move_line".full_reconcile_id IS NULL '
+        reconcile_clause, reconcile_params = self._get_reconcile_clause(data)
 
-        params = [partner.id, tuple(data['computed']['move_state']), tuple(data['computed']['account_ids'])] + query_get_data[2]
+        params = [partner.id, tuple(data['computed']['move_state']), tuple(data['computed']['account_ids'])] + query_get_data[2] + reconcile_params
         query = """SELECT sum(""" + field + """)
                 FROM """ + query_get_data[0] + """, account_move AS m
                 WHERE "account_move_line".partner_id = %s
@@ -65,6 +82,64 @@ class ReportPartnerLedger(models.AbstractModel):
             result = contemp[0] or 0.0
         return result
 
+    def _get_partner_ledger_queries(self, data, partner_ids=None):
+        """ Return the ``[(query, params)]`` batches fetching the ledger lines
+            of ``partner_ids``, or of every partner when None. """
+        query_get_data = self.env['account.move.line'].with_context(data['form'].get('used_context', {}))._query_get()
+        reconcile_clause, reconcile_params = self._get_reconcile_clause(data)
+        query_head = """
+            SELECT "account_move_line".partner_id, "account_move_line".id, "account_move_line".date, j.code, acc.name->>'en_US' as a_name, "account_move_line".ref, m.name as move_name, "account_move_line".name, "account_move_line".debit, "account_move_line".credit, "account_move_line".amount_currency,"account_move_line".currency_id, c.symbol AS currency_code
+            FROM """ + query_get_data[0] + """
+            LEFT JOIN account_journal j ON ("account_move_line".journal_id = j.id)
+            LEFT JOIN account_account acc ON ("account_move_line".account_id = acc.id)
+            LEFT JOIN res_currency c ON ("account_move_line".currency_id=c.id)
+            LEFT JOIN account_move m ON (m.id="account_move_line".move_id)
+            WHERE """
+        query_tail = """
+                AND m.state IN %s
+                AND "account_move_line".account_id IN %s AND """ + query_get_data[1] + reconcile_clause + """
+                ORDER BY "account_move_line".partner_id, "account_move_line".date, "account_move_line".id"""
+        common_params = [tuple(data['computed']['move_state']), tuple(data['computed']['account_ids'])] + query_get_data[2] + reconcile_params
+        if partner_ids is None:
+            partner_clause = '"account_move_line".partner_id IS NOT NULL'
+            batches = [(query_head + partner_clause + query_tail, common_params)]
+        else:
+            partner_clause = '"account_move_line".partner_id IN %s'
+            batches = [
+                (query_head + partner_clause + query_tail, [tuple(chunk)] + common_params)
+                for chunk in split_every(PARTNER_CHUNK_SIZE, partner_ids)
+            ]
+        return batches
+
+    def _get_partner_ledger_data(self, data, partner_ids=None):
+        """ Fetch the ledger lines of all partners at once.
+
+            :param partner_ids: ids of the partners to print, or None to
+                take every partner having lines matching the filters
+            :returns: a dictionary ``{partner_id: {'lines': [...],
+                'debit': ..., 'credit': ..., 'debit - credit': ...}}``
+                where the lines have the same keys as ``_lines``
+        """
+        currency = self.env['res.currency']
+        result = {}
+        for query, params in self._get_partner_ledger_queries(data, partner_ids):
+            self.env.cr.execute(query, tuple(params))
+            for r in self.env.cr.dictfetchall():
+                partner_data = result.setdefault(r.pop('partner_id'), {
+                    'lines': [], 'debit': 0.0, 'credit': 0.0, 'debit - credit': 0.0,
+                })
+                r['displayed_name'] = '-'.join(
+                    r[field_name] for field_name in ('move_name', 'ref', 'name')
+                    if r[field_name] not in (None, '', '/')
+                )
+                partner_data['debit'] += r['debit']
+                partner_data['credit'] += r['credit']
+                partner_data['debit - credit'] += r['debit'] - r['credit']
+                r['progress'] = partner_data['debit - credit']
+                r['currency_id'] = currency.browse(r.get('currency_id'))
+                partner_data['lines'].append(r)
+        return result
+
     @api.model
     def _get_report_values(self, docids, data=None):
         if not data.get('form'):
@@ -72,7 +147,6 @@ class ReportPartnerLedger(models.AbstractModel):
         data['computed'] = {}
 
         obj_partner = self.env['res.partner']
-        query_get_data = self.env['account.move.line'].with_context(data['form'].get('used_context', {}))._query_get()
         data['computed']['move_state'] = ['draft', 'posted']
         if data['form'].get('target_move', 'all') == 'posted':
             data['computed']['move_state'] = ['posted']
@@ -90,26 +164,23 @@ class ReportPartnerLedger(models.AbstractModel):
             WHERE a.account_type IN %s
             AND NOT a.deprecated""", (tuple(data['computed']['ACCOUNT_TYPE']),))
         data['computed']['account_ids'] = [a for (a,) in self.env.cr.fetchall()]
-        params = [tuple(data['computed']['move_state']), tuple(data['computed']['account_ids'])] + query_get_data[2]
-        reconcile_clause = "" if data['form']['reconciled'] else ' AND "account_move_line".full_reconcile_id IS NULL '
-        query = """
-            SELECT DISTINCT "account_move_line".partner_id
-            FROM """ + query_get_data[0] + """, account_account AS account, account_move AS am
-            WHERE "account_move_line".partner_id IS NOT NULL
-                AND "account_move_line".account_id = account.id
-                AND am.id = "account_move_line".move_id
-                AND am.state IN %s
-                AND "account_move_line".account_id IN %s
-                AND NOT account.deprecated
-                AND """ + query_get_data[1] + reconcile_clause
-        self.env.cr.execute(query, tuple(params))
         if data['form']['partner_ids']:
             partner_ids = data['form']['partner_ids']
+            ledger = self._get_partner_ledger_data(data, partner_ids)
         else:
-            partner_ids = [res['partner_id'] for res in
-                           self.env.cr.dictfetchall()]
+            ledger = self._get_partner_ledger_data(data)
+            partner_ids = list(ledger)
         partners = obj_partner.browse(partner_ids)
         partners = sorted(partners, key=lambda x: (x.ref or '', x.name or ''))
+        empty = {'lines': [], 'debit': 0.0, 'credit': 0.0, 'debit - credit': 0.0}
+
+        def lines(data, partner):
+            return ledger.get(partner.id, empty)['lines']
+
+        def sum_partner(data, partner, field):
+            if field not in ['debit', 'credit', 'debit - credit']:
+                return
+            return ledger.get(partner.id, empty)[field]
 
         return {
             'doc_ids': partner_ids,
@@ -117,6 +188,25 @@ class ReportPartnerLedger(models.AbstractModel):
             'data': data,
             'docs': partners,
             'time': time,
-            'lines': self._lines,
-            'sum_partner': self._sum_partner,
+            'lines': lines,
+            'sum_partner': sum_partner,
         }
+
+    def _get_xlsx_rows(self, data, values):
+        """ Rows of the spreadsheet export, see ``account.report.xlsx``. """
+        amount_currency = data['form'].get('amount_currency')
+        header = [_('Date'), _('JRNL'), _('Account'), _('Ref'), _('Debit'), _('Credit'), _('Balance')]
+        if amount_currency:
+            header += [_('Amount Currency'), _('Currency')]
+        yield 'header', header
+        lines, sum_partner = values['lines'], values['sum_partner']
+        for partner in values['docs']:
+            yield 'section', ['%s - %s' % (partner.ref or '', partner.name or ''), '', '', '',
+                              sum_partner(data, partner, 'debit'), sum_partner(data, partner, 'credit'),
+                              sum_partner(data, partner, 'debit - credit')]
+            for line in lines(data, partner):
+                row = [line['date'], line['code'], line['a_name'], line['displayed_name'],
+                       line['debit'], line['credit'], line['progress']]
+                if amount_currency and line['currency_id']:
+                    row += [line['amount_currency'], line['currency_id'].name]
+                yield 'line', row
@@ -10,61 +10,99 @@ class ReportTax(models.AbstractModel):
     def _get_report_values(self, docids, data=None):
         if not data.get('form'):
             raise UserError(_("Form content is missing, this report cannot be printed."))
+        period_labels = []
+        if data['form'].get('period_split'):
+            period_labels = [label for start, label in self.env['account.move.line']._get_report_periods(
+                data['form']['date_from'], data['form']['date_to'], data['form']['period_split'])]
         return {
             'data': data['form'],
             'lines': self.get_lines(data.get('form')),
+            'period_labels': period_labels,
         }
 
-    def _sql_from_amls_one(self):
-        sql = """SELECT "account_move_line".tax_line_id, COALESCE(SUM("account_move_line".debit-"account_move_line".credit), 0)
-                    FROM %s
-                    WHERE %s GROUP BY "account_move_line".tax_line_id"""
-        return sql
-
-    def _sql_from_amls_two(self):
-        sql = """SELECT r.account_tax_id, COALESCE(SUM("account_move_line".debit-"account_move_line".credit), 0)
+    def _sql_from_amls(self, period_split=False):
+        """ Tax and net amounts per tax in a single scan of the move lines:
+            every line yields one row for its tax line and one row per tax
+            applied on it, which are summed apart with FILTER aggregates. """
+        period = "date_trunc('%s', \"account_move_line\".date)::date" % ('quarter' if period_split == 'quarter' else 'month') if period_split else "NULL::date"
+        sql = """SELECT t.tax_id, """ + period + """ AS period,
+                        COALESCE(SUM("account_move_line".debit-"account_move_line".credit) FILTER (WHERE t.is_tax_line), 0),
+                        COALESCE(SUM("account_move_line".debit-"account_move_line".credit) FILTER (WHERE NOT t.is_tax_line), 0)
                  FROM %s
-                 INNER JOIN account_move_line_account_tax_rel r ON ("account_move_line".id = r.account_move_line_id)
-                 INNER JOIN account_tax t ON (r.account_tax_id = t.id)
-                 WHERE %s GROUP BY r.account_tax_id"""
+                 CROSS JOIN LATERAL (
+                     SELECT "account_move_line".tax_line_id AS tax_id, TRUE AS is_tax_line
+                     WHERE "account_move_line".tax_line_id IS NOT NULL
+                     UNION ALL
+                     SELECT r.account_tax_id, FALSE
+                     FROM account_move_line_account_tax_rel r
+                     WHERE r.account_move_line_id = "account_move_line".id
+                 ) t
+                 WHERE %s GROUP BY t.tax_id, period"""
         return sql
 
-    def _compute_from_amls(self, options, taxes):
-        #compute the tax amount
-        sql = self._sql_from_amls_one()
+    def _get_amls_query(self, period_split=False):
+        """ Return the query of ``_sql_from_amls`` (and its params) for the
+            filters of the context. """
         tables, where_clause, where_params = self.env['account.move.line']._query_get()
-        query = sql % (tables, where_clause)
-        self.env.cr.execute(query, where_params)
-        results = self.env.cr.fetchall()
-        for result in results:
-            if result[0] in taxes:
-                taxes[result[0]]['tax'] = abs(result[1])
+        return self._sql_from_amls(period_split) % (tables, where_clause), where_params
 
-        #compute the net amount
-        sql2 = self._sql_from_amls_two()
-        query = sql2 % (tables, where_clause)
+    def _compute_from_amls(self, options, taxes):
+        period_split = options.get('period_split')
+        query, where_params = self._get_amls_query(period_split)
         self.env.cr.execute(query, where_params)
-        results = self.env.cr.fetchall()
-        for result in results:
-            if result[0] in taxes:
-                taxes[result[0]]['net'] = abs(result[1])
+        totals = {}
+        for tax_id, period, tax_amount, net_amount in self.env.cr.fetchall():
+            if tax_id not in taxes:
+                continue
+            total = totals.setdefault(tax_id, [0.0, 0.0])
+            total[0] += tax_amount
+            total[1] += net_amount
+            if period_split:
+                taxes[tax_id]['periods'][period] = {'tax': abs(tax_amount), 'net': abs(net_amount)}
+        for tax_id, (tax_amount, net_amount) in totals.items():
+            taxes[tax_id]['tax'] = abs(tax_amount)
+            taxes[tax_id]['net'] = abs(net_amount)
 
-    @api.model
-    def get_lines(self, options):
+    def _get_report_taxes(self):
+        """ Return ``{tax_id: line}`` for the taxes reported on, the children
+            of group taxes being reported with the type of their parent. """
         taxes = {}
         for tax in self.env['account.tax'].search([('type_tax_use', '!=', 'none')]):
             if tax.children_tax_ids:
                 for child in tax.children_tax_ids:
                     if child.type_tax_use != 'none':
                         continue
-                    taxes[child.id] = {'tax': 0, 'net': 0, 'name': child.name, 'type': tax.type_tax_use}
+                    taxes[child.id] = {'tax': 0, 'net': 0, 'name': child.name, 'type': tax.type_tax_use, 'periods': {}}
             else:
-                taxes[tax.id] = {'tax': 0, 'net': 0, 'name': tax.name, 'type': tax.type_tax_use}
+                taxes[tax.id] = {'tax': 0, 'net': 0, 'name': tax.name, 'type': tax.type_tax_use, 'periods': {}}
+        return taxes
+
+    @api.model
+    def get_lines(self, options):
+        taxes = self._get_report_taxes()
         self.with_context(date_from=options['date_from'], date_to=options['date_to'],
                           state=options['target_move'],
                           strict_range=True)._compute_from_amls(options, taxes)
+        periods = []
+        if options.get('period_split'):
+            periods = self.env['account.move.line']._get_report_periods(options['date_from'], options['date_to'], options['period_split'])
         groups = dict((tp, []) for tp in ['sale', 'purchase'])
         for tax in taxes.values():
             if tax['tax']:
+                tax['tax_periods'] = [tax['periods'].get(start, {}).get('tax', 0.0) for start, label in periods]
+                tax['net_periods'] = [tax['periods'].get(start, {}).get('net', 0.0) for start, label in periods]
                 groups[tax['type']].append(tax)
         return groups
+
+    def _get_xlsx_rows(self, data, values):
+        """ Rows of the spreadsheet export, see ``account.report.xlsx``. """
+        period_header = []
+        for label in values['period_labels']:
+            period_header += [_('%s Net', label), _('%s Tax', label)]
+        for tax_type, title in [('sale', _('Sale')), ('purchase', _('Purchase'))]:
+            yield 'header', [title, _('Net'), _('Tax')] + period_header
+            for line in values['lines'][tax_type]:
+                row = [line['name'], line['net'], line['tax']]
+                for net, tax in zip(line['net_periods'], line['tax_periods']):
+                    row += [net, tax]
+                yield 'line', row
@@ -7,20 +7,60 @@ class ReportTrialBalance(models.AbstractModel):
     _name = 'report.accounting_pdf_reports.report_trialbalance'
     _description = 'Trial Balance Report'
 
-    def _get_accounts(self, accounts, display_account):
+    def _get_accounts(self, accounts, display_account, periods=None):
         """ compute the balance, debit and credit for the provided accounts
             :Arguments:
                 `accounts`: list of accounts record,
                 `display_account`: it's used to display either all accounts or those accounts which balance is > 0
+                `periods`: optional ``(period_split, [period starts])`` to also compute the balance of each month
+                           or quarter
             :Returns a list of dictionary of Accounts with following key and value
                 `name`: Account name,
                 `code`: Account code,
                 `credit`: total amount of credit,
                 `debit`: total amount of debit,
                 `balance`: total amount of balance,
+                `balance_periods`: balance of each period, when `periods` is given
         """
+        if periods:
+            return self._get_accounts_by_period(accounts, display_account, *periods)
 
-        account_result = {}
+        # posted entries are read from the monthly balance snapshot when the
+        # filters allow it
+        if self.env.context.get('consolidate'):
+            Consolidation = self.env['account.report.consolidation']
+            accounts = Consolidation._get_displayed_accounts(accounts)
+            account_result = Consolidation._get_balances(accounts.ids)
+        else:
+            account_result = self.env['account.balance.snapshot']._get_balances(accounts.ids)
+        if account_result is None:
+            account_result = {}
+            request, params = self._get_accounts_query(accounts.ids)
+            self.env.cr.execute(request, params)
+            for row in self.env.cr.dictfetchall():
+                account_result[row.pop('id')] = row
+
+        account_res = []
+        for account in accounts:
+            res = dict((fn, 0.0) for fn in ['credit', 'debit', 'balance'])
+            currency = account.currency_id and account.currency_id or self.env.company.currency_id
+            res['code'] = account.code
+            res['name'] = account.name
+            if account.id in account_result:
+                res['debit'] = account_result[account.id].get('debit')
+                res['credit'] = account_result[account.id].get('credit')
+                res['balance'] = account_result[account.id].get('balance')
+            if display_account == 'all':
+                account_res.append(res)
+            if display_account == 'not_zero' and not currency.is_zero(res['balance']):
+                account_res.append(res)
+            if display_account == 'movement' and (not currency.is_zero(res['debit']) or not currency.is_zero(res['credit'])):
+                account_res.append(res)
+        return account_res
+
+    def _get_accounts_query(self, account_ids):
+        """ Return the query (and its params) computing the balance, debit
+            and credit of ``account_ids`` for the filters of the context. """
         # Prepare sql query base on selected parameters from wizard
         tables, where_clause, where_params = self.env['account.move.line']._query_get()
         tables = tables.replace('"','')
@@ -34,21 +74,26 @@ class ReportTrialBalance(models.AbstractModel):
         request = ("SELECT account_id AS id, SUM(debit) AS debit, SUM(credit) AS credit, "
                    "(SUM(debit) - SUM(credit)) AS balance" +\
                    " FROM " + tables + " WHERE account_id IN %s " + filters + " GROUP BY account_id")
-        params = (tuple(accounts.ids),) + tuple(where_params)
-        self.env.cr.execute(request, params)
-        for row in self.env.cr.dictfetchall():
-            account_result[row.pop('id')] = row
+        params = (tuple(account_ids),) + tuple(where_params)
+        return request, params
 
+    def _get_accounts_by_period(self, accounts, display_account, period_split, period_starts):
+        """ Variant of ``_get_accounts`` computing the totals and the balance
+            of each period from a single grouped query. """
+        period_balances = self.env['account.move.line']._get_period_balances(accounts.ids, period_split)
         account_res = []
         for account in accounts:
             res = dict((fn, 0.0) for fn in ['credit', 'debit', 'balance'])
             currency = account.currency_id and account.currency_id or self.env.company.currency_id
             res['code'] = account.code
             res['name'] = account.name
-            if account.id in account_result:
-                res['debit'] = account_result[account.id].get('debit')
-                res['credit'] = account_result[account.id].get('credit')
-                res['balance'] = account_result[account.id].get('balance')
+            res['balance_periods'] = []
+            for start in period_starts:
+                value = period_balances.get(start, {}).get(account.id)
+                res['balance_periods'].append(value['balance'] if value else 0.0)
+                if value:
+                    for field in ['credit', 'debit', 'balance']:
+                        res[field] += value[field]
             if display_account == 'all':
                 account_res.append(res)
             if display_account == 'not_zero' and not currency.is_zero(res['balance']):
@@ -72,7 +117,13 @@ class ReportTrialBalance(models.AbstractModel):
             analytic_account_ids = self.env['account.analytic.account'].browse(data['form'].get('analytic_account_ids'))
             context['analytic_account_ids'] = analytic_account_ids
             analytic_accounts = [account.name for account in analytic_account_ids]
-        account_res = self.with_context(context)._get_accounts(accounts, display_account)
+        periods = []
+        if data['form'].get('period_split'):
+            periods = self.env['account.move.line']._get_report_periods(
+                data['form']['date_from'], data['form']['date_to'], data['form']['period_split'])
+        account_res = self.with_context(context)._get_accounts(
+            accounts, display_account,
+            periods=periods and (data['form']['period_split'], [start for start, label in periods]))
         codes = []
         if data['form'].get('journal_ids', False):
             codes = [journal.code for journal in
@@ -87,4 +138,12 @@ class ReportTrialBalance(models.AbstractModel):
             'analytic_accounts': analytic_accounts,
             'time': time,
             'Accounts': account_res,
+            'period_labels': [label for start, label in periods],
         }
+
+    def _get_xlsx_rows(self, data, values):
+        """ Rows of the spreadsheet export, see ``account.report.xlsx``. """
+        yield 'header', [_('Code'), _('Account'), _('Debit'), _('Credit'), _('Balance')] + values['period_labels']
+        for account in values['Accounts']:
+            yield 'line', [account['code'], account['name'], account['debit'], account['credit'],
+                           account['balance']] + list(account.get('balance_periods', []))
@@ -0,0 +1,101 @@
+import tempfile
+
+import xlsxwriter
+
+from odoo import api, models, _
+from odoo.exceptions import UserError
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class AccountReportXlsx(models.AbstractModel):
+    """ Spreadsheet export of the accounting reports.
+
+        The values of a report are computed by its ``_get_report_values``, as
+        for the PDF, then the rows yielded by its ``_get_xlsx_rows`` are
+        written in order in a constant memory worksheet: rows are flushed to
+        the file as soon as the next one is started.
+    """
+    _name = 'account.report.xlsx'
+    _description = 'Accounting Report Spreadsheet Export'
+
+    @api.model
+    def _get_xlsx_styles(self, workbook):
+        amount = {'num_format': '#,##0.00'}
+        return {
+            'title': workbook.add_format({'bold': True, 'font_size': 14}),
+            'header': workbook.add_format({'bold': True, 'bottom': 1}),
+            'section': workbook.add_format({'bold': True}),
+            'section_amount': workbook.add_format(dict(amount, bold=True)),
+            'line': None,
+            'line_amount': workbook.add_format(amount),
+        }
+
+    @api.model
+    def _write_xlsx(self, output, title, rows):
+        """ Write ``rows``, an iterable of ``(kind, cells)`` where ``kind`` is
+            one of 'header', 'section' or 'line', into the file ``output``. """
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        styles = self._get_xlsx_styles(workbook)
+        sheet = workbook.add_worksheet(title[:31])
+        sheet.set_column(0, 0, 14)
+        sheet.set_column(1, 20, 18)
+        sheet.write(0, 0, title, styles['title'])
+        row_index = 2
+        for kind, cells in rows:
+            for col, value in enumerate(cells):
+                if value is None or value == '':
+                    continue
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    sheet.write_number(row_index, col, value, styles.get(kind + '_amount') or styles[kind])
+                else:
+                    sheet.write_string(row_index, col, str(value), styles[kind])
+            row_index += 1
+        workbook.close()
+
+    @api.model
+    def _render_xlsx(self, action):
+        """ Render the spreadsheet of the report ``action`` returned by the
+            ``check_report`` of a wizard, as ``(content, filename)``. """
+        report = self.env['ir.actions.report']._get_report_from_name(action['report_name'])
+        report_model = self.env['report.%s' % action['report_name']]
+        if not hasattr(report_model, '_get_xlsx_rows'):
+            raise UserError(_("The report %s cannot be exported to a spreadsheet.", report.name))
+        context = dict(action.get('context') or {})
+        data = action['data']
+        # the rows are written in order, the general ledger can be streamed
+        data['form']['streaming'] = True
+        report_model = report_model.with_context(context)
+        res_ids = context.get('active_ids', [])
+
+        def render():
+            values = report_model._get_report_values(res_ids, data=data)
+            with tempfile.TemporaryFile() as output:
+                self._write_xlsx(output, report.name, report_model._get_xlsx_rows(data, values))
+                output.seek(0)
+                return output.read(), '%s.xlsx' % report.name
+
+        return self.env['account.report.cache'].with_context(context)._get_or_render(
+            action['report_name'], 'xlsx', res_ids, data, render)
+
+    @api.model
+    def _export(self, wizard, action):
+        """ Export the report of the report ``action`` returned by the
+            ``check_report`` of ``wizard``, and return the action downloading
+            the spreadsheet. """
+        context = dict(action.get('context') or {})
+        context.setdefault('active_model', wizard._name)
+        context.setdefault('active_ids', wizard.ids)
+        content, filename = self._render_xlsx(dict(action, context=context))
+        attachment = self.env['ir.attachment'].create({
+            'name': filename,
+            'raw': content,
+            'mimetype': XLSX_MIMETYPE,
+            'res_model': wizard._name,
+            'res_id': wizard.id,
+        })
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % attachment.id,
+            'target': 'self',
+        }
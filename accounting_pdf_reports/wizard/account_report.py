@@ -1,4 +1,5 @@
-from odoo import api, fields, models
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
 
 
 class AccountingReport(models.TransientModel):
@@ -28,6 +29,13 @@ class AccountingReport(models.TransientModel):
                                        "the way your balances are computed."
                                        " Because it is space consuming, we do not allow to"
                                        " use it while doing a comparison.")
+    period_split = fields.Selection([('month', 'Monthly'), ('quarter', 'Quarterly')],
+                                    string='Period Columns',
+                                    help="Display the balance of each month or quarter of the "
+                                         "selected dates side by side.")
+    consolidate = fields.Boolean(string='Consolidate Companies',
+                                 help="Compute the companies selected in the company switcher in parallel "
+                                      "and translate their balances into the currency of the current company.")
 
     def _build_comparison_context(self, data):
         result = {}
@@ -37,6 +45,9 @@ class AccountingReport(models.TransientModel):
             result['date_from'] = data['form']['date_from_cmp']
             result['date_to'] = data['form']['date_to_cmp']
             result['strict_range'] = True
+        if self.consolidate:
+            result['consolidate'] = True
+            result['journal_ids'] = False
         return result
 
     def check_report(self):
@@ -51,5 +62,9 @@ class AccountingReport(models.TransientModel):
         return res
 
     def _print_report(self, data):
-        data['form'].update(self.read(['date_from_cmp', 'debit_credit', 'date_to_cmp', 'filter_cmp', 'account_report_id', 'enable_filter', 'label_filter', 'target_move'])[0])
+        data['form'].update(self.read(['date_from_cmp', 'debit_credit', 'date_to_cmp', 'filter_cmp', 'account_report_id', 'enable_filter', 'label_filter', 'target_move', 'period_split'])[0])
+        if data['form']['period_split'] and not (data['form']['date_from'] and data['form']['date_to']):
+            raise UserError(_("You must set a start and an end date to display period columns."))
+        if data['form']['period_split'] and self.consolidate:
+            raise UserError(_("Period columns are not available in a consolidated report."))
         return self.env.ref('accounting_pdf_reports.action_report_financial').report_action(self, data=data, config=False)
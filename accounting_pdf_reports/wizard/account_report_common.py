@@ -36,6 +36,10 @@ class AccountCommonReport(models.TransientModel):
         result['date_to'] = data['form']['date_to'] or False
         result['strict_range'] = True if result['date_from'] else False
         result['company_id'] = data['form']['company_id'][0] or False
+        if data['form'].get('consolidate'):
+            # every journal of every allowed company
+            result['consolidate'] = True
+            result['journal_ids'] = False
         return result
 
     def _print_report(self, data):
@@ -46,7 +50,49 @@ class AccountCommonReport(models.TransientModel):
         data = {}
         data['ids'] = self.env.context.get('active_ids', [])
         data['model'] = self.env.context.get('active_model', 'ir.ui.menu')
-        data['form'] = self.read(['date_from', 'date_to', 'journal_ids', 'target_move', 'company_id'])[0]
+        form_fields = ['date_from', 'date_to', 'journal_ids', 'target_move', 'company_id']
+        if 'consolidate' in self._fields:
+            # only declared by the reports able to consolidate the companies
+            form_fields.append('consolidate')
+        data['form'] = self.read(form_fields)[0]
         used_context = self._build_contexts(data)
         data['form']['used_context'] = dict(used_context, lang=get_lang(self.env).code)
         return self.with_context(discard_logo_check=True)._print_report(data)
+
+    def check_report_xlsx(self):
+        """ Same as ``check_report``, exporting the report to a spreadsheet
+            instead of rendering the PDF. """
+        self.ensure_one()
+        action = self.check_report()
+        if action.get('type') != 'ir.actions.report':
+            return action
+        return self.env['account.report.xlsx']._export(self, action)
+
+    def check_report_background(self):
+        """ Same as ``check_report``, rendering the report in a background
+            job; the user is notified when the result is available in the
+            report jobs. """
+        self.ensure_one()
+        action = self.check_report()
+        if action.get('type') != 'ir.actions.report':
+            return action
+        context = dict(action.get('context') or {})
+        context.setdefault('active_model', self._name)
+        context.setdefault('active_ids', self.ids)
+        job = self.env['account.report.job']._enqueue(
+            dict(action, context=context), report_format=self.env.context.get('report_format', 'pdf'))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'info',
+                'title': _("Accounting Report"),
+                'message': _("%s is being generated, you will be notified when it is ready.", job.name),
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    def check_report_xlsx_background(self):
+        """ Same as ``check_report_xlsx``, exporting the spreadsheet in a
+            background job. """
+        return self.with_context(report_format='xlsx').check_report_background()
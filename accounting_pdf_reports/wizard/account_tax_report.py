@@ -15,6 +15,13 @@ class AccountTaxReport(models.TransientModel):
         string='Date To', required=True,
         default=lambda self: fields.Date.to_string(date.today())
     )
+    period_split = fields.Selection(
+        [('month', 'Monthly'), ('quarter', 'Quarterly')],
+        string='Period Columns',
+        help="Display the net and tax amounts of each month or quarter of "
+             "the selected dates side by side."
+    )
 
     def _print_report(self, data):
+        data['form'].update(self.read(['period_split'])[0])
         return self.env.ref('accounting_pdf_reports.action_report_account_tax').report_action(self, data=data)
@@ -1,4 +1,5 @@
-from odoo import fields, models, api
+from odoo import fields, models, api, _
+from odoo.exceptions import UserError
 
 
 class AccountBalanceReport(models.TransientModel):
@@ -15,9 +16,23 @@ class AccountBalanceReport(models.TransientModel):
         'account.analytic.account',
         'account_trial_balance_analytic_rel', string='Analytic Accounts'
     )
+    period_split = fields.Selection(
+        [('month', 'Monthly'), ('quarter', 'Quarterly')],
+        string='Period Columns',
+        help="Display the balance of each month or quarter of the "
+             "selected dates side by side."
+    )
+    consolidate = fields.Boolean(string='Consolidate Companies',
+                                 help="Compute the companies selected in the company switcher in parallel "
+                                      "and translate their balances into the currency of the current company.")
 
     def _get_report_data(self, data):
         data = self.pre_print_report(data)
+        data['form'].update(self.read(['period_split'])[0])
+        if data['form']['period_split'] and not (data['form']['date_from'] and data['form']['date_to']):
+            raise UserError(_("You must set a start and an end date to display period columns."))
+        if data['form']['period_split'] and self.consolidate:
+            raise UserError(_("Period columns are not available in a consolidated report."))
         records = self.env[data['model']].browse(data.get('ids', []))
         return records, data
 
@@ -18,6 +18,7 @@
         'wizard/asset_depreciation_confirmation_wizard_views.xml',
         'wizard/asset_modify_views.xml',
         'views/account_asset_views.xml',
+        'views/account_asset_depreciation_job_views.xml',
         'views/account_move_views.xml',
         'views/account_asset_templates.xml',
         'views/asset_category_views.xml',
@@ -16,8 +16,12 @@ class AccountMove(models.Model):
                 line.move_posted_check = False
         return super(AccountMove, self).button_cancel()
 
+    def unlink(self):
+        # the depreciation lines are unlinked by the database, which does
+        # not go through their write
+        self.env['asset.asset.report']._refresh_assets_on_commit(self.asset_depreciation_ids.asset_id.ids)
+        return super(AccountMove, self).unlink()
+
     def action_post(self):
-        for move in self:
-            for depreciation_line in move.asset_depreciation_ids:
-                depreciation_line.post_lines_and_close_asset()
+        self.asset_depreciation_ids.post_lines_and_close_asset()
         return super(AccountMove, self).action_post()
@@ -4,9 +4,33 @@ from dateutil.relativedelta import relativedelta
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools import float_compare, float_is_zero
+from odoo.tools import float_compare, float_is_zero, split_every
 from markupsafe import Markup
 
+# number of depreciation lines whose entries are created and posted together
+MOVE_BATCH_SIZE = 500
+
+# fields of an asset its depreciation board is computed from
+BOARD_FIELDS = {
+    'value', 'salvage_value', 'currency_id', 'company_id', 'date', 'prorata',
+    'method', 'method_number', 'method_period', 'method_end', 'method_progress_factor', 'method_time',
+    'date_first_depreciation', 'first_depreciation_manual_date',
+}
+
+# number of assets projected together by the depreciation forecast
+FORECAST_BATCH_SIZE = 1000
+
+# fields of an asset the rows of the assets analysis are computed from,
+# besides the ones recomputing its board
+ANALYSIS_FIELDS = {
+    'active', 'state', 'date', 'value', 'code', 'category_id', 'partner_id', 'company_id',
+    'depreciation_line_ids',
+}
+
+# fields of a depreciation line the rows of the assets analysis are
+# computed from
+LINE_ANALYSIS_FIELDS = {'name', 'asset_id', 'amount', 'depreciation_date', 'move_id', 'move_check'}
+
 
 class AccountAssetCategory(models.Model):
     _name = 'account.asset.category'
@@ -207,6 +231,11 @@ class AccountAssetAsset(models.Model):
         help='Note that this date does not alter the computation of the first '
              'journal entry in case of prorata temporis assets. It simply changes its accounting date'
     )
+    board_dirty = fields.Boolean(
+        string='Depreciation Board to Recompute', copy=False, readonly=True,
+        help='Set when the depreciation board was left to be recomputed later, see '
+             'the "defer_depreciation_board" context key.'
+    )
 
     def unlink(self):
         for asset in self:
@@ -215,6 +244,7 @@ class AccountAssetAsset(models.Model):
             for depreciation_line in asset.depreciation_line_ids:
                 if depreciation_line.move_id:
                     raise UserError(_('You cannot delete a document that contains posted entries.'))
+        self.env['asset.asset.report']._refresh_assets_on_commit(self.ids)
         return super(AccountAssetAsset, self).unlink()
 
     @api.model
@@ -222,15 +252,32 @@ class AccountAssetAsset(models.Model):
         self.compute_generated_entries(datetime.today())
 
     @api.model
-    def compute_generated_entries(self, date, asset_type=None):
+    def _compute_dirty_boards(self):
+        """ Compute the depreciation boards left to recompute by the writes
+            made with the ``defer_depreciation_board`` context key. """
+        self.search([('board_dirty', '=', True)]).compute_depreciation_board()
+
+    @api.model
+    def load(self, fields, data):
+        """ Compute the boards of the imported assets at once, after the
+            import, instead of one asset at a time. """
+        res = super(AccountAssetAsset, self.with_context(defer_depreciation_board=True)).load(fields, data)
+        if not self.env.context.get('defer_depreciation_board'):
+            self._compute_dirty_boards()
+        return res
+
+    @api.model
+    def compute_generated_entries(self, date, asset_type=None, progress=None):
         # Entries generated : one by grouped category and one by asset from ungrouped category
+        # ``progress(done, total)`` is called after each batch of ungrouped entries
         created_move_ids = []
         type_domain = []
         if asset_type:
             type_domain = [('type', '=', asset_type)]
+        self._compute_dirty_boards()
 
         ungrouped_assets = self.env['account.asset.asset'].search(type_domain + [('state', '=', 'open'), ('category_id.group_entries', '=', False)])
-        created_move_ids += ungrouped_assets._compute_entries(date, group_entries=False)
+        created_move_ids += ungrouped_assets._compute_entries(date, group_entries=False, progress=progress)
 
         for grouped_category in self.env['account.asset.category'].search(type_domain + [('group_entries', '=', True)]):
             assets = self.env['account.asset.asset'].search([('state', '=', 'open'), ('category_id', '=', grouped_category.id)])
@@ -284,75 +331,181 @@ class AccountAssetAsset(models.Model):
             undone_dotation_number += 1
         return undone_dotation_number
 
-    def compute_depreciation_board(self):
+    def _compute_board_dates(self, depreciation_date, count):
+        """ Return the ``count`` successive depreciation dates starting at
+            ``depreciation_date``. """
+        month_day = depreciation_date.day
+        dates = []
+        for x in range(count):
+            dates.append(depreciation_date)
+            depreciation_date = depreciation_date + relativedelta(months=+self.method_period)
+
+            if month_day > 28 and self.date_first_depreciation == 'manual':
+                max_day_in_month = calendar.monthrange(depreciation_date.year, depreciation_date.month)[1]
+                depreciation_date = depreciation_date.replace(day=min(max_day_in_month, month_day))
+
+            # datetime doesn't take into account that the number of days is not the same for each month
+            if not self.prorata and self.method_period % 12 != 0 and self.date_first_depreciation == 'last_day_period':
+                max_day_in_month = calendar.monthrange(depreciation_date.year, depreciation_date.month)[1]
+                depreciation_date = depreciation_date.replace(day=max_day_in_month)
+        return dates
+
+    def _compute_board_first_date(self, posted_depreciation_line_ids):
+        # if we already have some previous validated entries, starting date is last entry + method period
+        if posted_depreciation_line_ids and posted_depreciation_line_ids[-1].depreciation_date:
+            last_depreciation_date = fields.Date.from_string(posted_depreciation_line_ids[-1].depreciation_date)
+            return last_depreciation_date + relativedelta(months=+self.method_period)
+        # depreciation_date computed from the purchase date
+        depreciation_date = self.date
+        if self.date_first_depreciation == 'last_day_period':
+            # depreciation_date = the last day of the month
+            depreciation_date = depreciation_date + relativedelta(day=31)
+            # ... or fiscalyear depending the number of period
+            if self.method_period == 12:
+                depreciation_date = depreciation_date + relativedelta(month=int(self.company_id.fiscalyear_last_month))
+                depreciation_date = depreciation_date + relativedelta(day=int(self.company_id.fiscalyear_last_day))
+                if depreciation_date < self.date:
+                    depreciation_date = depreciation_date + relativedelta(years=1)
+        elif self.first_depreciation_manual_date and self.first_depreciation_manual_date != self.date:
+            # depreciation_date set manually from the 'first_depreciation_manual_date' field
+            depreciation_date = self.first_depreciation_manual_date
+        return depreciation_date
+
+    def _compute_board_values(self, posted_depreciation_line_ids, value_residual=None):
+        """ Return the values of the unposted depreciation lines of the
+            asset, following its posted lines ``posted_depreciation_line_ids``
+            sorted by date. Nothing is written. ``value_residual`` defaults
+            to the residual value of the asset. """
         self.ensure_one()
+        vals_list = []
+        if value_residual is None:
+            value_residual = self.value_residual
+        if value_residual == 0.0:
+            return vals_list
+        amount_to_depr = residual_amount = value_residual
+        depreciation_date = self._compute_board_first_date(posted_depreciation_line_ids)
+        total_days = (depreciation_date.year % 4) and 365 or 366
+        undone_dotation_number = self._compute_board_undone_dotation_nb(depreciation_date, total_days)
+        # the dates are only used by the non zero amounts
+        dates = iter(self._compute_board_dates(
+            depreciation_date, max(undone_dotation_number - len(posted_depreciation_line_ids), 0)))
+        depreciation_date = next(dates, depreciation_date)
+
+        for x in range(len(posted_depreciation_line_ids), undone_dotation_number):
+            sequence = x + 1
+            amount = self._compute_board_amount(sequence, residual_amount, amount_to_depr,
+                                                undone_dotation_number, posted_depreciation_line_ids,
+                                                total_days, depreciation_date)
+            amount = self.currency_id.round(amount)
+            if float_is_zero(amount, precision_rounding=self.currency_id.rounding):
+                continue
+            residual_amount -= amount
+            vals_list.append({
+                'amount': amount,
+                'asset_id': self.id,
+                'sequence': sequence,
+                'name': (self.code or '') + '/' + str(sequence),
+                'remaining_value': residual_amount,
+                'depreciated_value': self.value - (self.salvage_value + residual_amount),
+                'depreciation_date': depreciation_date,
+            })
+            depreciation_date = next(dates, depreciation_date)
+        return vals_list
 
-        posted_depreciation_line_ids = self.depreciation_line_ids.filtered(lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
-        unposted_depreciation_line_ids = self.depreciation_line_ids.filtered(lambda x: not x.move_check)
-
-        # Remove old unposted depreciation lines. We cannot use unlink() with One2many field
-        commands = [(2, line_id.id, False) for line_id in unposted_depreciation_line_ids]
-
-        if self.value_residual != 0.0:
-            amount_to_depr = residual_amount = self.value_residual
-
-            # if we already have some previous validated entries, starting date is last entry + method period
-            if posted_depreciation_line_ids and posted_depreciation_line_ids[-1].depreciation_date:
-                last_depreciation_date = fields.Date.from_string(posted_depreciation_line_ids[-1].depreciation_date)
-                depreciation_date = last_depreciation_date + relativedelta(months=+self.method_period)
-            else:
-                # depreciation_date computed from the purchase date
-                depreciation_date = self.date
-                if self.date_first_depreciation == 'last_day_period':
-                    # depreciation_date = the last day of the month
-                    depreciation_date = depreciation_date + relativedelta(day=31)
-                    # ... or fiscalyear depending the number of period
-                    if self.method_period == 12:
-                        depreciation_date = depreciation_date + relativedelta(month=int(self.company_id.fiscalyear_last_month))
-                        depreciation_date = depreciation_date + relativedelta(day=int(self.company_id.fiscalyear_last_day))
-                        if depreciation_date < self.date:
-                            depreciation_date = depreciation_date + relativedelta(years=1)
-                elif self.first_depreciation_manual_date and self.first_depreciation_manual_date != self.date:
-                    # depreciation_date set manually from the 'first_depreciation_manual_date' field
-                    depreciation_date = self.first_depreciation_manual_date
-            total_days = (depreciation_date.year % 4) and 365 or 366
-            month_day = depreciation_date.day
-            undone_dotation_number = self._compute_board_undone_dotation_nb(depreciation_date, total_days)
-
-            for x in range(len(posted_depreciation_line_ids), undone_dotation_number):
-                sequence = x + 1
-                amount = self._compute_board_amount(sequence, residual_amount, amount_to_depr,
-                                                    undone_dotation_number, posted_depreciation_line_ids,
-                                                    total_days, depreciation_date)
-                amount = self.currency_id.round(amount)
-                if float_is_zero(amount, precision_rounding=self.currency_id.rounding):
-                    continue
-                residual_amount -= amount
-                vals = {
-                    'amount': amount,
-                    'asset_id': self.id,
-                    'sequence': sequence,
-                    'name': (self.code or '') + '/' + str(sequence),
-                    'remaining_value': residual_amount,
-                    'depreciated_value': self.value - (self.salvage_value + residual_amount),
-                    'depreciation_date': depreciation_date,
-                }
-                commands.append((0, False, vals))
-
-                depreciation_date = depreciation_date + relativedelta(months=+self.method_period)
-
-                if month_day > 28 and self.date_first_depreciation == 'manual':
-                    max_day_in_month = calendar.monthrange(depreciation_date.year, depreciation_date.month)[1]
-                    depreciation_date = depreciation_date.replace(day=min(max_day_in_month, month_day))
-
-                # datetime doesn't take into account that the number of days is not the same for each month
-                if not self.prorata and self.method_period % 12 != 0 and self.date_first_depreciation == 'last_day_period':
-                    max_day_in_month = calendar.monthrange(depreciation_date.year, depreciation_date.month)[1]
-                    depreciation_date = depreciation_date.replace(day=max_day_in_month)
+    def compute_depreciation_board(self):
+        """ Replace the unposted depreciation lines of the assets by their new
+            schedule. The boards of all the assets are computed in memory,
+            then the old lines are removed and the new ones inserted with
+            one call each. """
+        lines = self.depreciation_line_ids
+        vals_list = []
+        for asset in self:
+            posted_depreciation_line_ids = asset.depreciation_line_ids.filtered(
+                lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
+            vals_list += asset._compute_board_values(posted_depreciation_line_ids)
+
+        # Remove old unposted depreciation lines
+        lines.filtered(lambda x: not x.move_check).unlink()
+        self.env['account.asset.depreciation.line'].create(vals_list)
+        self.filtered('board_dirty').write({'board_dirty': False})
+        self.env['asset.asset.report']._refresh_assets_on_commit(self.ids)
+        return True
 
-        self.write({'depreciation_line_ids': commands})
+    @api.model
+    def get_depreciation_forecast(self, date_from=None, months=60, domain=None, overrides=None):
+        """ Project the depreciation of the draft and running assets matching
+            ``domain`` over ``months`` months from ``date_from`` (the current
+            month by default), without writing anything.
+
+            The lines already linked to an entry are counted as they are in
+            their month, and the unposted part of each board is recomputed in
+            memory from them, with the values of ``overrides`` (e.g. ``{'method':
+            'degressive', 'method_number': 10}``) replacing those of every
+            asset, then the amounts are converted into the company currency
+            and summed per company, category and month.
+
+            :returns: ``{'months': [first day of each month], 'lines': [{
+                'company_id', 'category_id', 'category', 'amounts', 'total'}]}``
+        """
+        self.check_access('read')
+        overrides = dict(overrides or {})
+        if not BOARD_FIELDS.issuperset(overrides):
+            raise UserError(_("The depreciation forecast cannot override %s.",
+                              ', '.join(sorted(set(overrides) - BOARD_FIELDS))))
+        start = fields.Date.to_date(date_from or fields.Date.context_today(self)).replace(day=1)
+        month_starts = [start + relativedelta(months=index) for index in range(months)]
+        assets = self.search((domain or []) + [('state', 'in', ('draft', 'open'))])
+
+        rates = {}
+        matrix = {}
+        for batch in split_every(FORECAST_BATCH_SIZE, assets.ids, self.browse):
+            for asset, vals_list in batch._get_forecast_boards(overrides):
+                company = asset.company_id
+                key = (asset.currency_id, company)
+                if key not in rates:
+                    rates[key] = self.env['res.currency']._get_conversion_rate(
+                        asset.currency_id, company.currency_id, company, start)
+                amounts = matrix.setdefault((company.id, asset.category_id.id), [0.0] * months)
+                for vals in vals_list:
+                    depreciation_date = vals['depreciation_date']
+                    index = (depreciation_date.year - start.year) * 12 + depreciation_date.month - start.month
+                    if 0 <= index < months:
+                        amounts[index] += vals['amount'] * rates[key]
+
+        categories = self.env['account.asset.category'].browse([category_id for company_id, category_id in matrix])
+        names = {category.id: category.display_name for category in categories}
+        return {
+            'months': [fields.Date.to_string(month_start) for month_start in month_starts],
+            'lines': [{
+                'company_id': company_id,
+                'category_id': category_id,
+                'category': names[category_id],
+                'amounts': amounts,
+                'total': sum(amounts),
+            } for (company_id, category_id), amounts in sorted(matrix.items())],
+        }
 
-        return True
+    def _get_forecast_boards(self, overrides):
+        """ Yield ``(asset, values of the depreciation lines)`` for the assets
+            of ``self``: the lines already linked to an entry as they are,
+            followed by the unposted ones computed with ``overrides``. """
+        # read the depreciation lines of all the assets at once
+        self.depreciation_line_ids.mapped('move_check')
+        for asset in self:
+            posted_depreciation_line_ids = asset.depreciation_line_ids.filtered(
+                lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
+            board, value_residual = asset, asset.value_residual
+            if overrides:
+                values = {name: asset[name] for name in BOARD_FIELDS}
+                values.update(overrides, code=asset.code)
+                board = asset.new(values)
+                value_residual = board.value - sum(posted_depreciation_line_ids.mapped('amount')) - board.salvage_value
+            posted_values = [{
+                'depreciation_date': line.depreciation_date,
+                'amount': line.amount,
+            } for line in posted_depreciation_line_ids]
+            yield asset, posted_values + board._compute_board_values(
+                posted_depreciation_line_ids, value_residual=value_residual)
 
     def validate(self):
         self.write({'state': 'open'})
@@ -506,26 +659,41 @@ class AccountAssetAsset(models.Model):
         default['name'] = self.name + _(' (copy)')
         return super(AccountAssetAsset, self).copy_data(default)
 
-    def _compute_entries(self, date, group_entries=False):
+    def _compute_entries(self, date, group_entries=False, progress=None):
         depreciation_ids = self.env['account.asset.depreciation.line'].search([
             ('asset_id', 'in', self.ids), ('depreciation_date', '<=', date),
             ('move_check', '=', False)])
         if group_entries:
             return depreciation_ids.create_grouped_move()
-        return depreciation_ids.create_move()
+        return depreciation_ids.create_move(progress=progress)
 
     @api.model_create_multi
     def create(self, vals_list):
         assets = super(AccountAssetAsset, self.with_context(mail_create_nolog=True)).create(vals_list)
-        for asset in assets:
-            asset.sudo().compute_depreciation_board()
+        if self.env.context.get('defer_depreciation_board'):
+            assets.sudo().write({'board_dirty': True})
+        else:
+            assets.sudo().compute_depreciation_board()
         return assets
 
     def write(self, vals):
+        """ The depreciation board is only recomputed when a field it depends
+            on (``BOARD_FIELDS``) is written. With the ``defer_depreciation_board``
+            context key, the assets are only flagged, and their boards are
+            computed at once by ``_compute_dirty_boards``, e.g. after a mass
+            edit or an import. """
         res = super(AccountAssetAsset, self).write(vals)
-        if 'depreciation_line_ids' not in vals and 'state' not in vals:
-            for rec in self:
-                rec.compute_depreciation_board()
+        if 'depreciation_line_ids' not in vals and 'state' not in vals and not BOARD_FIELDS.isdisjoint(vals):
+            if self.env.context.get('defer_depreciation_board'):
+                super(AccountAssetAsset, self).write({'board_dirty': True})
+            else:
+                self.compute_depreciation_board()
+        elif 'code' in vals:
+            # the unposted lines are named after the reference of the asset
+            for line in self.depreciation_line_ids.filtered(lambda x: not x.move_check):
+                line.name = (line.asset_id.code or '') + '/' + str(line.sequence)
+        if not ANALYSIS_FIELDS.isdisjoint(vals):
+            self.env['asset.asset.report']._refresh_assets_on_commit(self.ids)
         return res
 
     def open_entries(self):
@@ -581,29 +749,60 @@ class AccountAssetDepreciationLine(models.Model):
         for line in self:
             line.move_posted_check = True if line.move_id and line.move_id.state == 'posted' else False
 
-    def create_move(self, post_move=True):
+    def create_move(self, post_move=True, progress=None):
+        """ Create one entry per depreciation line, ``MOVE_BATCH_SIZE`` lines
+            at a time: the entries of a batch are created together, linked to
+            their lines with one query and posted together when the category
+            of their asset is auto-confirmed. ``progress(done, total)`` is
+            called after each batch.
+        """
+        if any(line.move_id for line in self):
+            raise UserError(_('This depreciation is already linked to a journal entry. Please post or delete it.'))
         created_moves = self.env['account.move']
-        for line in self:
-            if line.move_id:
-                raise UserError(_('This depreciation is already linked to a journal entry. Please post or delete it.'))
-            move_vals = self._prepare_move(line)
-            move = self.env['account.move'].create(move_vals)
-            line.write({'move_id': move.id, 'move_check': True})
-            created_moves |= move
-
-        if post_move and created_moves:
-            created_moves.filtered(lambda m: any(m.asset_depreciation_ids.mapped('asset_id.category_id.open_asset'))).action_post()
+        rates = {}
+        done = 0
+        for lines in split_every(MOVE_BATCH_SIZE, self.ids, self.browse):
+            moves = self.env['account.move'].create([self._prepare_move(line, rates) for line in lines])
+            lines._link_moves(moves)
+            if post_move:
+                moves.browse([
+                    move.id for line, move in zip(lines, moves) if line.asset_id.category_id.open_asset
+                ]).action_post()
+            created_moves |= moves
+            done += len(lines)
+            if progress:
+                progress(done, len(self))
         return [x.id for x in created_moves]
 
-    def _prepare_move(self, line):
+    def _link_moves(self, moves):
+        """ Set the entries ``moves`` on the lines of ``self``, in order. """
+        self.flush_recordset(['move_id', 'move_check'])
+        self.env.cr.execute("""
+            UPDATE account_asset_depreciation_line line
+            SET move_id = link.move_id, move_check = TRUE, write_uid = %s, write_date = NOW() AT TIME ZONE 'UTC'
+            FROM (SELECT UNNEST(%s) AS id, UNNEST(%s) AS move_id) link
+            WHERE line.id = link.id""", (self.env.uid, self.ids, moves.ids))
+        self.invalidate_recordset(['move_id', 'move_check', 'write_uid', 'write_date'])
+        moves.invalidate_recordset(['asset_depreciation_ids'])
+        self.modified(['move_id'])
+        self.env['asset.asset.report']._refresh_assets_on_commit(self.asset_id.ids)
+
+    def _prepare_move(self, line, rates=None):
+        """ Return the values of the entry of ``line``; ``rates`` memoizes
+            the conversion rates between calls. """
         category_id = line.asset_id.category_id
         analytic_distribution = line.asset_id.analytic_distribution
         depreciation_date = self.env.context.get('depreciation_date') or line.depreciation_date or fields.Date.context_today(self)
         company_currency = line.asset_id.company_id.currency_id
         current_currency = line.asset_id.currency_id
+        company = line.asset_id.company_id
         prec = company_currency.decimal_places
-        amount = current_currency._convert(
-            line.amount, company_currency, line.asset_id.company_id, depreciation_date)
+        rates = {} if rates is None else rates
+        key = (current_currency, company_currency, company, depreciation_date)
+        if key not in rates:
+            rates[key] = self.env['res.currency']._get_conversion_rate(
+                current_currency, company_currency, company, depreciation_date)
+        amount = company_currency.round(line.amount * rates[key])
         asset_name = line.asset_id.name + ' (%s/%s)' % (line.sequence, len(line.asset_id.depreciation_line_ids))
         move_line_1 = {
             'name': asset_name,
@@ -642,12 +841,17 @@ class AccountAssetDepreciationLine(models.Model):
 
         depreciation_date = self.env.context.get('depreciation_date') or fields.Date.context_today(self)
         amount = 0.0
+        rates = {}
         for line in self:
             # Sum amount of all depreciation lines
             company_currency = line.asset_id.company_id.currency_id
             current_currency = line.asset_id.currency_id
             company = line.asset_id.company_id
-            amount += current_currency._convert(line.amount, company_currency, company, fields.Date.today())
+            key = (current_currency, company_currency, company)
+            if key not in rates:
+                rates[key] = self.env['res.currency']._get_conversion_rate(
+                    current_currency, company_currency, company, fields.Date.today())
+            amount += company_currency.round(line.amount * rates[key])
 
         name = category_id.name + _(' (grouped)')
         move_line_1 = {
@@ -682,6 +886,7 @@ class AccountAssetDepreciationLine(models.Model):
         created_moves = self.env['account.move']
         move = self.env['account.move'].create(self._prepare_move_grouped())
         self.write({'move_id': move.id, 'move_check': True})
+        self.env['asset.asset.report']._refresh_assets_on_commit(self.asset_id.ids)
         created_moves |= move
 
         if post_move and created_moves:
@@ -717,6 +922,21 @@ class AccountAssetDepreciationLine(models.Model):
                 msg = _format_message(_('Depreciation line posted.'), msg_values)
                 line.asset_id.message_post(body=msg)
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(AccountAssetDepreciationLine, self).create(vals_list)
+        self.env['asset.asset.report']._refresh_assets_on_commit(lines.asset_id.ids)
+        return lines
+
+    def write(self, vals):
+        if LINE_ANALYSIS_FIELDS.isdisjoint(vals):
+            return super(AccountAssetDepreciationLine, self).write(vals)
+        # the former asset too, when the lines are moved to another one
+        asset_ids = set(self.asset_id.ids)
+        res = super(AccountAssetDepreciationLine, self).write(vals)
+        self.env['asset.asset.report']._refresh_assets_on_commit(asset_ids | set(self.asset_id.ids))
+        return res
+
     def unlink(self):
         for record in self:
             if record.move_check:
@@ -725,4 +945,5 @@ class AccountAssetDepreciationLine(models.Model):
                 else:
                     msg = _("You cannot delete posted installment lines.")
                 raise UserError(msg)
+        self.env['asset.asset.report']._refresh_assets_on_commit(self.asset_id.ids)
         return super(AccountAssetDepreciationLine, self).unlink()
\ No newline at end of file
@@ -0,0 +1,102 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+
+from odoo import api, fields, models, _
+
+_logger = logging.getLogger(__name__)
+
+
+class AccountAssetDepreciationJob(models.Model):
+    """ Generation of the depreciation entries in a scheduled action.
+
+        The job commits after each batch of ``MOVE_BATCH_SIZE`` entries
+        together with its progress. A job interrupted midway keeps the
+        entries of its committed batches, and a new job only generates the
+        remaining ones, as the lines linked to an entry are skipped.
+    """
+    _name = "account.asset.depreciation.job"
+    _description = "Asset Entries Generation Job"
+    _order = "id desc"
+
+    date = fields.Date(string='Account Date', required=True, readonly=True)
+    asset_type = fields.Char(string='Asset Type', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', required=True, readonly=True,
+                              default=lambda self: self.env.user, index=True)
+    company_ids = fields.Many2many('res.company', string='Allowed Companies', readonly=True,
+                                   default=lambda self: self.env.companies)
+    state = fields.Selection([('queued', 'Queued'), ('running', 'Running'),
+                              ('done', 'Done'), ('failed', 'Failed')],
+                             string='Status', required=True, default='queued', readonly=True, index=True)
+    progress = fields.Float(string='Progress', readonly=True, help="Percentage of the entries generated.")
+    move_ids = fields.Many2many('account.move', string='Created Entries', readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.model
+    def _enqueue(self, date, asset_type=None):
+        """ Queue the generation of the entries up to ``date``. """
+        # the jobs are only read by their users, the generation checks the
+        # access rights of the user
+        job = self.sudo().create({
+            'date': date,
+            'asset_type': asset_type,
+            'user_id': self.env.uid,
+            'company_ids': [(6, 0, self.env.companies.ids)],
+        })
+        self.env.ref('om_account_asset.asset_depreciation_batch_cron').sudo()._trigger()
+        return self.browse(job.id)
+
+    def _set_progress(self, progress, **values):
+        self.sudo().write(dict(values, progress=progress))
+        self.env.cr.commit()
+
+    def _get_moves_action(self):
+        return {
+            'name': _('Created Asset Moves') if self.asset_type == 'purchase' else _('Created Revenue Moves'),
+            'view_mode': 'list,form',
+            'res_model': 'account.move',
+            'view_id': False,
+            'domain': [('id', 'in', self.move_ids.ids)],
+            'type': 'ir.actions.act_window',
+        }
+
+    def action_open_moves(self):
+        self.ensure_one()
+        return self._get_moves_action()
+
+    def _run(self):
+        self.ensure_one()
+        self._set_progress(0.0, state='running', error=False)
+        env = self.env(user=self.user_id.id, context=dict(self.env.context, allowed_company_ids=self.company_ids.ids),
+                       su=False)
+        try:
+            # commit point after each batch of entries
+            created_move_ids = env['account.asset.asset'].compute_generated_entries(
+                self.date, asset_type=self.asset_type,
+                progress=lambda done, total: self._set_progress(100.0 * done / total))
+            self._set_progress(100.0, state='done', move_ids=[(6, 0, created_move_ids)])
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception("Asset entries generation job %s failed", self.id)
+            self._set_progress(self.progress, state='failed', error=str(e))
+        self.user_id.partner_id._bus_send('simple_notification', {
+            'type': 'success' if self.state == 'done' else 'danger',
+            'title': _("Generate Entries"),
+            'message': _("The asset entries are generated.") if self.state == 'done'
+                       else _("The asset entries could not be generated."),
+        })
+
+    @api.model
+    def _cron_process_jobs(self):
+        # the scheduled action never runs twice at once: a running job was
+        # interrupted, e.g. by the time limit of its worker
+        stale_jobs = self.search([('state', '=', 'running')])
+        if stale_jobs:
+            stale_jobs.write({
+                'state': 'failed',
+                'error': _("The generation was interrupted. The entries of the lines left "
+                           "can be generated again."),
+            })
+            self.env.cr.commit()
+        for job in self.search([('state', '=', 'queued')], order='id'):
+            job._run()
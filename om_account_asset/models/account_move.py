@@ -44,11 +44,12 @@ class AccountMove(models.Model):
 
     def action_post(self):
         result = super(AccountMove, self).action_post()
+        rates = {}
         for inv in self:
             context = dict(self.env.context)
             context.pop('default_type', None)
             for mv_line in inv.invoice_line_ids:
-                mv_line.with_context(context).asset_create()
+                mv_line.with_context(context).asset_create(rates)
         return result
 
 
@@ -111,14 +112,16 @@ class AccountMoveLine(models.Model):
                     rec.asset_start_date = start_date
                     rec.asset_end_date = end_date
 
-    def asset_create(self):
+    def asset_create(self, rates=None):
+        """ Create the asset of the line; ``rates`` memoizes the conversion
+            rates between calls. """
         if self.asset_category_id:
-            price_subtotal = self.currency_id._convert(
-                self.price_subtotal,
-                self.company_currency_id,
-                self.company_id,
-                self.move_id.invoice_date or fields.Date.context_today(
-                    self))
+            rates = {} if rates is None else rates
+            date = self.move_id.invoice_date or fields.Date.context_today(self)
+            key = (self.currency_id, self.company_currency_id, self.company_id, date)
+            if key not in rates:
+                rates[key] = self.env['res.currency']._get_conversion_rate(*key)
+            price_subtotal = self.company_currency_id.round(self.price_subtotal * rates[key])
             vals = {
                 'name': self.name,
                 'code': self.name or False,
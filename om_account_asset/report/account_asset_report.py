@@ -1,4 +1,6 @@
-from odoo import api, fields, models, tools
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import AccessError
+from odoo.tools.sql import create_index
 
 
 class AssetAssetReport(models.Model):
@@ -23,43 +25,93 @@ class AssetAssetReport(models.Model):
     unposted_value = fields.Float(string='Unposted Amount', readonly=True)
     company_id = fields.Many2one('res.company', string='Company', readonly=True)
 
+    def _select(self, where=''):
+        """ Return the query of the rows of the report; the gross value of an
+            asset is given on the row of its first depreciation line. """
+        return """
+            select
+                min(dl.id) as id,
+                dl.name as name,
+                dl.depreciation_date as depreciation_date,
+                a.date as date,
+                (CASE WHEN min(min(dl.id)) OVER (PARTITION BY dl.asset_id) = min(dl.id)
+                  THEN a.value
+                  ELSE 0
+                  END) as gross_value,
+                dl.amount as depreciation_value,
+                dl.amount as installment_value,
+                (CASE WHEN dl.move_check
+                  THEN dl.amount
+                  ELSE 0
+                  END) as posted_value,
+                (CASE WHEN NOT dl.move_check
+                  THEN dl.amount
+                  ELSE 0
+                  END) as unposted_value,
+                dl.asset_id as asset_id,
+                dl.move_check as move_check,
+                a.category_id as asset_category_id,
+                a.partner_id as partner_id,
+                a.state as state,
+                count(dl.*) as installment_nbr,
+                count(dl.*) as depreciation_nbr,
+                a.company_id as company_id
+            from account_asset_depreciation_line dl
+                join account_asset_asset a on (dl.asset_id=a.id)
+            where a.active is true """ + where + """
+            group by
+                dl.amount,dl.asset_id,dl.depreciation_date,dl.name,
+                a.date, dl.move_check, a.state, a.category_id, a.partner_id, a.company_id,
+                a.value, a.id, a.salvage_value"""
+
     def init(self):
+        """ The report is stored in a table, filled from ``_select``: it is
+            rebuilt here and by ``_refresh``, and updated per asset by
+            ``_refresh_assets`` when the boards or the entries change. """
         tools.drop_view_if_exists(self._cr, 'asset_asset_report')
-        self._cr.execute("""
-            create or replace view asset_asset_report as (
-                select
-                    min(dl.id) as id,
-                    dl.name as name,
-                    dl.depreciation_date as depreciation_date,
-                    a.date as date,
-                    (CASE WHEN dlmin.id = min(dl.id)
-                      THEN a.value
-                      ELSE 0
-                      END) as gross_value,
-                    dl.amount as depreciation_value,
-                    dl.amount as installment_value,
-                    (CASE WHEN dl.move_check
-                      THEN dl.amount
-                      ELSE 0
-                      END) as posted_value,
-                    (CASE WHEN NOT dl.move_check
-                      THEN dl.amount
-                      ELSE 0
-                      END) as unposted_value,
-                    dl.asset_id as asset_id,
-                    dl.move_check as move_check,
-                    a.category_id as asset_category_id,
-                    a.partner_id as partner_id,
-                    a.state as state,
-                    count(dl.*) as installment_nbr,
-                    count(dl.*) as depreciation_nbr,
-                    a.company_id as company_id
-                from account_asset_depreciation_line dl
-                    left join account_asset_asset a on (dl.asset_id=a.id)
-                    left join (select min(d.id) as id,ac.id as ac_id from account_asset_depreciation_line as d inner join account_asset_asset as ac ON (ac.id=d.asset_id) group by ac_id) as dlmin on dlmin.ac_id=a.id
-                where a.active is true 
-                group by
-                    dl.amount,dl.asset_id,dl.depreciation_date,dl.name,
-                    a.date, dl.move_check, a.state, a.category_id, a.partner_id, a.company_id,
-                    a.value, a.id, a.salvage_value, dlmin.id
-        )""")
+        self._cr.execute("DROP TABLE IF EXISTS asset_asset_report")
+        self._cr.execute("CREATE TABLE asset_asset_report AS (" + self._select() + ")")
+        self._cr.execute("ALTER TABLE asset_asset_report ADD PRIMARY KEY (id)")
+        for column in ('asset_id', 'asset_category_id', 'depreciation_date', 'date', 'company_id'):
+            create_index(self._cr, 'asset_asset_report_%s_index' % column, 'asset_asset_report', [column])
+
+    @api.model
+    def _refresh(self):
+        """ Rebuild the whole report. """
+        self.env['account.asset.asset'].flush_model()
+        self.env['account.asset.depreciation.line'].flush_model()
+        self._cr.execute("DELETE FROM asset_asset_report")
+        self._cr.execute("INSERT INTO asset_asset_report " + self._select())
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_assets(self, asset_ids):
+        """ Recompute the rows of the assets ``asset_ids``. """
+        if not asset_ids:
+            return
+        self.env['account.asset.asset'].flush_model()
+        self.env['account.asset.depreciation.line'].flush_model()
+        self._cr.execute("DELETE FROM asset_asset_report WHERE asset_id IN %s", (tuple(asset_ids),))
+        self._cr.execute("INSERT INTO asset_asset_report " + self._select("and dl.asset_id IN %s"), (tuple(asset_ids),))
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_assets_on_commit(self, asset_ids):
+        """ Recompute the rows of the assets ``asset_ids`` once, at the end
+            of the transaction. """
+        data = self.env.cr.precommit.data
+        if 'asset.asset.report.asset_ids' not in data:
+            data['asset.asset.report.asset_ids'] = set()
+            self.env.cr.precommit.add(
+                lambda: self.sudo()._refresh_assets(data.pop('asset.asset.report.asset_ids', ())))
+        data['asset.asset.report.asset_ids'].update(asset_ids)
+
+    @api.model
+    def action_refresh(self):
+        if not self.env.user.has_group('account.group_account_manager'):
+            raise AccessError(_("Only the accounting managers can refresh the assets analysis."))
+        self.sudo()._refresh()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
@@ -12,14 +12,23 @@ class AssetDepreciationConfirmationWizard(models.TransientModel):
         help="Choose the period for which you want to automatically post the depreciation lines of running assets",
         default=fields.Date.context_today
     )
+    asset_type = fields.Char(string='Asset Type', readonly=True,
+                             default=lambda self: self.env.context.get('asset_type'))
+    job_id = fields.Many2one('account.asset.depreciation.job', string='Background Job', readonly=True)
+    state = fields.Selection([('draft', 'Draft'), ('queued', 'Queued'), ('running', 'Running'),
+                              ('done', 'Done'), ('failed', 'Failed')],
+                             string='Status', compute='_compute_state')
+    progress = fields.Float(related='job_id.progress')
+    error = fields.Text(related='job_id.error')
 
-    def asset_compute(self):
-        self.ensure_one()
-        context = self._context
-        created_move_ids = self.env['account.asset.asset'].compute_generated_entries(self.date, asset_type=context.get('asset_type'))
+    @api.depends('job_id.state')
+    def _compute_state(self):
+        for wizard in self:
+            wizard.state = wizard.job_id.state or 'draft'
 
+    def _get_moves_action(self, created_move_ids):
         return {
-            'name': _('Created Asset Moves') if context.get('asset_type') == 'purchase' else _('Created Revenue Moves'),
+            'name': _('Created Asset Moves') if self.asset_type == 'purchase' else _('Created Revenue Moves'),
             'view_type': 'form',
             'view_mode': 'list,form',
             'res_model': 'account.move',
@@ -27,3 +36,30 @@ class AssetDepreciationConfirmationWizard(models.TransientModel):
             'domain': "[('id','in',[" + ','.join(str(id) for id in created_move_ids) + "])]",
             'type': 'ir.actions.act_window',
         }
+
+    def asset_compute(self):
+        self.ensure_one()
+        created_move_ids = self.env['account.asset.asset'].compute_generated_entries(self.date, asset_type=self.asset_type)
+        return self._get_moves_action(created_move_ids)
+
+    def asset_compute_background(self):
+        """ Generate the entries in a scheduled action; the wizard shows the
+            progress of the job. """
+        self.ensure_one()
+        self.job_id = self.env['account.asset.depreciation.job']._enqueue(self.date, asset_type=self.asset_type)
+        return self.action_refresh()
+
+    def action_refresh(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'context': self.env.context,
+        }
+
+    def action_open_moves(self):
+        self.ensure_one()
+        return self.job_id.action_open_moves()
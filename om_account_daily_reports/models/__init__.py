@@ -0,0 +1 @@
+from . import account_journal
@@ -0,0 +1,39 @@
+from odoo import api, models, tools
+
+
+class AccountJournal(models.Model):
+    _inherit = "account.journal"
+
+    @api.model
+    def _get_book_account_ids(self, journal_type, include_default=False):
+        """ Return the ids of the payment accounts of the journals of type
+            ``journal_type`` of the current companies, with the default
+            account of the journals when ``include_default`` is set. """
+        return list(self._get_book_account_ids_cached(journal_type, include_default, self._get_book_accounts_stamp()))
+
+    @api.model
+    def _get_book_accounts_stamp(self):
+        """ Return a value changing whenever a journal or a payment method
+            line is created, written or deleted: it is part of the cache key
+            instead of clearing the caches of the registry on every change. """
+        self.flush_model()
+        self.env['account.payment.method.line'].flush_model()
+        self.env.cr.execute("""
+            SELECT (SELECT ROW(COUNT(*), MAX(write_date))::text FROM account_journal),
+                   (SELECT ROW(COUNT(*), MAX(write_date))::text FROM account_payment_method_line)""")
+        return self.env.cr.fetchone()
+
+    @api.model
+    @tools.ormcache('self.env.uid', 'tuple(self.env.companies.ids)', 'journal_type', 'include_default', 'stamp')
+    def _get_book_account_ids_cached(self, journal_type, include_default, stamp):
+        # the journals are searched with the record rules of the user
+        account_ids = []
+        for journal in self.search([('type', '=', journal_type)]):
+            accounts = journal.outbound_payment_method_line_ids.payment_account_id.ids + \
+                journal.inbound_payment_method_line_ids.payment_account_id.ids
+            if include_default and journal.default_account_id:
+                accounts.insert(0, journal.default_account_id.id)
+            for account_id in accounts:
+                if account_id not in account_ids:
+                    account_ids.append(account_id)
+        return tuple(account_ids)
@@ -7,18 +7,8 @@ class AccountBankBookReport(models.TransientModel):
     _description = "Bank Book Report"
 
     def _get_default_account_ids(self):
-        journals = self.env['account.journal'].search([('type', '=', 'bank')])
-        accounts = self.env['account.account']
-        for journal in journals:
-            if journal.default_account_id.id:
-                accounts += journal.default_account_id
-            for acc_out in journal.outbound_payment_method_line_ids:
-                if acc_out.payment_account_id:
-                    accounts += acc_out.payment_account_id
-            for acc_in in journal.inbound_payment_method_line_ids:
-                if acc_in.payment_account_id:
-                    accounts += acc_in.payment_account_id
-        return accounts
+        return self.env['account.account'].browse(
+            self.env['account.journal']._get_book_account_ids('bank', include_default=True))
 
     date_from = fields.Date(string='Start Date', default=date.today(), required=True)
     date_to = fields.Date(string='End Date', default=date.today(), required=True)